@@ -1,21 +1,17 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import plotly.graph_objects as go
-from datetime import datetime, timedelta, date
-import pytz
+from datetime import datetime, timedelta
 import math
-from scipy.stats import norm
+from market_engine import (CT_TZ, ENTRY_HOURS_LEFT, ENTRY_T, RATE_PER_CANDLE, TRADING_MINUTES_PER_YEAR, bs_chain, bs_chain_grid, bs_premium, calculate_ladder, count_candles_between,
+                           detect_inflection_points, filter_ny_session, generate_ny_signal, get_target_time, line_touch_probabilities,
+                           load_market_data, store_sync)
+import metrics
+from metrics import cache_stats, count, prometheus_text, snapshot, span, write_metrics
+from journal import CONFLUENCE_FACTORS, PAGE_SIZE, count_entries, fetch_page, record_outcomes, record_signals, win_rate_by_score
 
-# --- 1. SYSTEM CONSTANTS ---
-RATE_PER_CANDLE = 0.52
-CANDLE_MINUTES = 30
-CT_TZ = pytz.timezone('US/Central')
-MAINTENANCE_START_HOUR = 16 
-MAINTENANCE_END_HOUR = 17 
-
-# --- 2. STREAMLIT CONFIG & THEME ---
+# --- 1. STREAMLIT CONFIG & THEME ---
 st.set_page_config(page_title="SPX PROPHET 2.0", layout="wide", initial_sidebar_state="expanded")
 
 def inject_custom_css():
@@ -58,124 +54,37 @@ def inject_custom_css():
         </style>
     """, unsafe_allow_html=True)
 
-# --- 3. CORE MATHEMATICS & TIME HANDLING ---
-def count_candles_between(start_dt: datetime, end_dt: datetime) -> int:
-    if start_dt.tzinfo is None: start_dt = CT_TZ.localize(start_dt)
-    if end_dt.tzinfo is None: end_dt = CT_TZ.localize(end_dt)
-    if start_dt >= end_dt: return 0
-    candle_count = 0
-    current_time = start_dt
-    while current_time < end_dt:
-        wd, hr = current_time.weekday(), current_time.hour
-        is_maint = (hr >= MAINTENANCE_START_HOUR and hr < MAINTENANCE_END_HOUR)
-        is_sat = (wd == 5)
-        is_sun_pre = (wd == 6 and hr < MAINTENANCE_END_HOUR)
-        is_fri_post = (wd == 4 and hr >= MAINTENANCE_START_HOUR)
-        if not (is_maint or is_sat or is_sun_pre or is_fri_post): candle_count += 1
-        current_time += timedelta(minutes=CANDLE_MINUTES)
-    return candle_count
-
-def project_line_value(anchor_price: float, anchor_time: datetime, target_time: datetime, is_ascending: bool) -> float:
-    return anchor_price + (RATE_PER_CANDLE * count_candles_between(anchor_time, target_time)) if is_ascending else anchor_price - (RATE_PER_CANDLE * count_candles_between(anchor_time, target_time))
-
-def get_target_time(target_date: date, hour: int) -> datetime:
-    next_day = target_date + timedelta(days=1)
-    while next_day.weekday() > 4: next_day += timedelta(days=1)
-    dt = datetime.combine(next_day, datetime.min.time()) + timedelta(hours=hour)
-    return CT_TZ.localize(dt)
-
-# Black-Scholes Model
-def bs_premium(S, K, T, r, sigma, option_type):
-    if T <= 0: return max(0.0, S - K) if option_type == 'C' else max(0.0, K - S)
-    d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
-    d2 = d1 - sigma * math.sqrt(T)
-    if option_type == 'C': return S * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
-    else: return K * math.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
-
-# --- 4. DATA ENGINE & AUTO-DETECTION ---
+# --- 2. DATA ENGINE & ANALYSIS CACHE ---
+# Analysis results are keyed on what they actually depend on: the data version plus the anchor date, target hour
+# and offset. Widgets that feed none of those (confluence, risk, VIX) live in fragments and never reach these.
+# The frames/inflections ride along as underscore args so Streamlit does not hash them.
+PIPELINE_CACHE_ENTRIES = 64
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda fn: fn)
+
 @st.cache_data(ttl=300)
-def get_market_data(symbol="ES=F"):
-    try:
-        data = yf.Ticker(symbol).history(period="10d", interval="30m")
-        data.index = data.index.tz_localize('UTC').tz_convert(CT_TZ) if data.index.tz is None else data.index.tz_convert(CT_TZ)
-        return data
-    except Exception: return None
-
-def filter_ny_session(df, target_date):
-    target_date_str = target_date.strftime('%Y-%m-%d')
-    try:
-        return df.loc[target_date_str].between_time('08:30', '15:00')
-    except KeyError:
-        return pd.DataFrame()
-
-def detect_inflection_points(ny_data):
-    if ny_data.empty or len(ny_data) < 2: return None
-    bounces, rejections = [], []
-    closes, times = np.asarray(ny_data['Close']), ny_data.index
-    n = len(closes)
-    for i in range(n):
-        if i == 0:
-            if closes[0] < closes[1]: bounces.append({'time': times[0], 'price': closes[0]})
-            if closes[0] > closes[1]: rejections.append({'time': times[0], 'price': closes[0]})
-        elif i == n - 1:
-            if closes[n-1] < closes[n-2]: bounces.append({'time': times[n-1], 'price': closes[n-1]})
-            if closes[n-1] > closes[n-2]: rejections.append({'time': times[n-1], 'price': closes[n-1]})
-        else:
-            if closes[i] < closes[i-1] and closes[i] < closes[i+1]: bounces.append({'time': times[i], 'price': closes[i]})
-            if closes[i] > closes[i-1] and closes[i] > closes[i+1]: rejections.append({'time': times[i], 'price': closes[i]})
-    bearish, bullish = ny_data[ny_data['Close'] < ny_data['Open']], ny_data[ny_data['Close'] > ny_data['Open']]
-    hw = {'time': bearish['High'].idxmax(), 'price': bearish.loc[bearish['High'].idxmax(), 'High']} if not bearish.empty else None
-    lw = {'time': bullish['Low'].idxmin(), 'price': bullish.loc[bullish['Low'].idxmin(), 'Low']} if not bullish.empty else None
-    return {'bounces': bounces, 'rejections': rejections, 'hw': hw, 'lw': lw}
-
-def calculate_ladder(inflections, target_time, offset=0.0):
-    lines = []
-    if inflections['hw']: lines.append({'label': 'HW', 'name': 'Highest Wick', 'dir': 'Ascending', 'val': project_line_value(inflections['hw']['price'], inflections['hw']['time'], target_time, True) - offset, 'is_key': True})
-    hb_val, hb_ref = -float('inf'), None
-    for i, b in enumerate(inflections['bounces']):
-        val = project_line_value(b['price'], b['time'], target_time, True) - offset
-        line = {'label': f'B{i+1}', 'name': 'Bounce', 'dir': 'Ascending', 'val': val, 'is_key': False}
-        lines.append(line)
-        if val > hb_val: hb_val, hb_ref = val, line
-    if hb_ref: hb_ref.update({'is_key': True, 'label': 'HB', 'name': 'Highest Bounce'})
-
-    if inflections['lw']: lines.append({'label': 'LW', 'name': 'Lowest Wick', 'dir': 'Descending', 'val': project_line_value(inflections['lw']['price'], inflections['lw']['time'], target_time, False) - offset, 'is_key': True})
-    lr_val, lr_ref = float('inf'), None
-    for i, r in enumerate(inflections['rejections']):
-        val = project_line_value(r['price'], r['time'], target_time, False) - offset
-        line = {'label': f'R{i+1}', 'name': 'Rejection', 'dir': 'Descending', 'val': val, 'is_key': False}
-        lines.append(line)
-        if val < lr_val: lr_val, lr_ref = val, line
-    if lr_ref: lr_ref.update({'is_key': True, 'label': 'LR', 'name': 'Lowest Rejection'})
-    lines.sort(key=lambda x: x['val'], reverse=True)
-    return lines
-
-# --- 5. LOGIC GENERATORS ---
-def generate_ny_signal(ladder, current_price):
-    asc_lines = [l for l in ladder if l['dir'] == 'Ascending']
-    desc_lines = [l for l in ladder if l['dir'] == 'Descending']
-    
-    above_all_asc = all(current_price > l['val'] for l in asc_lines) if asc_lines else False
-    below_all_asc = all(current_price < l['val'] for l in asc_lines) if asc_lines else False
-    above_all_desc = all(current_price > l['val'] for l in desc_lines) if desc_lines else False
-    below_all_desc = all(current_price < l['val'] for l in desc_lines) if desc_lines else False
-
-    if below_all_asc and below_all_desc: return "PUT", "Price is below all structural lines. Strong Bearish Trend.", "signal-put"
-    if above_all_asc and above_all_desc: return "CALL", "Price broke through all resistance and support. Strong Bullish Trend.", "signal-call"
-    if below_all_asc: return "PUT", "Price is below all ascending resistance. Buyers are trapped above.", "signal-put"
-    if above_all_asc: return "CALL", "Price broke above all ascending resistance. Bullish continuation.", "signal-call"
-    
-    nearest_above = next((l for l in reversed(ladder) if l['val'] > current_price), None)
-    nearest_below = next((l for l in ladder if l['val'] < current_price), None)
-    
-    if nearest_above and nearest_below:
-        if nearest_above['dir'] == 'Ascending' and nearest_below['dir'] == 'Descending': return "WAIT", f"Choppy. Trapped between Resistance ({nearest_above['label']}) and Support ({nearest_below['label']}).", "signal-wait"
-        if nearest_above['dir'] == 'Descending': return "PUT", f"Bearish Lean. Price capped by descending resistance ({nearest_above['label']}).", "signal-put"
-        if nearest_below['dir'] == 'Ascending': return "CALL", f"Bullish Lean. Price propped by ascending support ({nearest_below['label']}).", "signal-call"
-    
-    return "WAIT", "Market context unclear based on current structural positioning.", "signal-wait"
+def get_market_data(symbol="ES=F", days=10):
+    count('get_market_data.miss') # Only runs on a cache miss; calls are counted by the caller
+    return load_market_data(symbol, days)
+
+def data_version(df):
+    return (len(df), int(df.index[-1].value), float(df['Close'].iloc[-1]))
+
+@st.cache_data(max_entries=PIPELINE_CACHE_ENTRIES)
+def get_session_analysis(version, target_date, _es_data):
+    ny_data = filter_ny_session(_es_data, target_date)
+    return ny_data, (detect_inflection_points(ny_data) if not ny_data.empty else None)
+
+@st.cache_data(max_entries=PIPELINE_CACHE_ENTRIES)
+def get_ladder(version, target_date, hour, offset, _inflections):
+    return calculate_ladder(_inflections, get_target_time(target_date, hour), offset=offset)
 
-# --- 6. UI RENDERERS ---
+@st.cache_resource(max_entries=PIPELINE_CACHE_ENTRIES)
+def build_session_figure(version, target_date, _ny_data):
+    fig = go.Figure(data=[go.Candlestick(x=_ny_data.index, open=_ny_data['Open'], high=_ny_data['High'], low=_ny_data['Low'], close=_ny_data['Close'])])
+    fig.update_layout(template="plotly_dark", margin=dict(l=0, r=0, t=0, b=0), height=600, xaxis_rangeslider_visible=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+# --- 3. UI RENDERERS ---
 def render_metric_card(label, value, color="#38bdf8"):
     st.markdown(f'<div class="metric-card"><div class="rajdhani" style="color: #64748b; font-size: 0.85rem; font-weight: 700; letter-spacing: 1px;">{label}</div><div class="metric-value" style="color: {color};">{value}</div></div>', unsafe_allow_html=True)
 
@@ -184,8 +93,11 @@ def render_spatial_ruler(ladder, current_price):
     if not ladder:
         st.write("No structural lines to display.")
         return
+    with span('spatial_ruler'): st.markdown(build_spatial_ruler_html(ladder, current_price), unsafe_allow_html=True)
 
-    all_items = ladder.copy()
+@st.cache_data(max_entries=PIPELINE_CACHE_ENTRIES)
+def build_spatial_ruler_html(ladder, current_price):
+    all_items = [dict(l) for l in ladder]
     all_items.append({'label': 'CURRENT', 'name': 'Market Price', 'dir': 'Neutral', 'val': current_price, 'is_key': True, 'is_live': True})
     
     # Sort descending by price (Highest price at top / 0%)
@@ -244,9 +156,160 @@ def render_spatial_ruler(ladder, current_price):
             </div>"""
             
     html += "</div>"
-    st.markdown(html, unsafe_allow_html=True)
+    return html
+
+# --- 4. WIDGET PANELS (fragments: their widgets only rerun the panel) ---
+@fragment
+def render_risk_calculator():
+    st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+    st.markdown("<h4 class='orbitron' style='color: #f59e0b;'>RISK CALCULATOR</h4>", unsafe_allow_html=True)
+    daily_limit = st.number_input("Prop Firm Daily Loss Limit ($)", value=2500, step=100)
+    risk_pct = st.slider("Max Risk per Trade (%)", 1, 10, 3)
+    stop_pts = st.number_input("Stop Loss Distance (Points)", value=5.0, step=0.5)
+    pt_value = 50.0 # ES Point Value
+    
+    max_risk_dollars = daily_limit * (risk_pct / 100)
+    risk_per_contract = stop_pts * pt_value
+    max_contracts = math.floor(max_risk_dollars / risk_per_contract) if risk_per_contract > 0 else 0
+    
+    st.markdown("---")
+    render_metric_card("Max Contracts (ES)", str(max_contracts), "#10b981" if max_contracts > 0 else "#e11d48")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@fragment
+def render_confluence_panel():
+    st.markdown("#### 5-FACTOR CONFLUENCE")
+    f1 = st.checkbox("1. Asian Alignment (+1)", help="Did Asian session trade in the same direction as the NY signal?")
+    f2 = st.checkbox("2. London Sweep Confirmed (+1)", help="Did London sweep Asian highs/lows before reversing?")
+    f3 = st.checkbox("3. 8:30 AM Data Absorbed/Aligned (+1)", help="Did economic data move in trade direction?")
+    f4 = st.checkbox("4. Opening Drive Aligned (+1)", help="Is the first 15-min candle driving in trade direction?")
+    f5 = st.checkbox("5. Line Cluster (+1)", help="Are 3+ lines within 15pts?")
+    
+    score = sum([f1, f2, f3, f4, f5])
+    size = "100% (3 Contracts)" if score >= 4 else "75% (2 Contracts)" if score >= 3 else "50% (1 Contract)" if score >= 2 else "NO TRADE"
+    color = "#10b981" if score >= 3 else "#f59e0b" if score >= 2 else "#e11d48"
+    render_metric_card(f"Score: {score}/5", f"Position: {size}", color)
+    # Fragments only share state through the session; the journal logger reads this
+    st.session_state['confluence'] = {'score': score, 'factors': sum(int(f) << i for i, f in enumerate([f1, f2, f3, f4, f5])),
+                                      'contracts': 3 if score >= 4 else 2 if score >= 3 else 1 if score >= 2 else 0}
+
+@fragment
+def render_journal_logger():
+    if st.button("📝 LOG SIGNAL TO JOURNAL", use_container_width=True):
+        entry = {**st.session_state.get('ny_signal', {}), **st.session_state.get('confluence', {}), **st.session_state.get('premium_estimate', {})}
+        if 'signal' not in entry: st.warning("No signal to log yet.")
+        elif st.session_state.get('journal_last_logged') == entry: st.info("Already logged; nothing changed since.") # Double clicks
+        else:
+            with span('journal_write'): record_signals([entry])
+            st.session_state['journal_last_logged'] = entry
+            st.success(f"Logged {entry['signal']} for {entry['session_date']} (score {entry.get('score', 0)}/5).")
+
+@st.cache_data(max_entries=PIPELINE_CACHE_ENTRIES)
+def build_decay_figure(current_spx, strike, hours_entry, vix, opt_type):
+    # Premium decay across the rest of the session for the strikes around the target
+    chain = np.arange(strike - 50, strike + 55, 5)
+    hours_left = np.linspace(hours_entry, 0.0, 13)
+    surface = bs_chain_grid(current_spx, chain, hours_left * 60 / TRADING_MINUTES_PER_YEAR, [vix], 0.0525, opt_type)['premium'][:, :, 0]
+    fig_decay = go.Figure(data=[go.Heatmap(z=surface, x=[f"{h:.1f}h" for h in hours_left], y=chain, colorscale='Viridis', colorbar=dict(title='$'))])
+    fig_decay.update_layout(template="plotly_dark", margin=dict(l=0, r=0, t=30, b=0), height=350, title="Premium Decay Surface", xaxis_title="Time Left", yaxis_title="Strike", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    return fig_decay
+
+FAT_TAIL_DF = 4 # Student-t degrees of freedom behind the fat-tails toggle
 
-# --- 7. MAIN APP ---
+@st.cache_data(max_entries=PIPELINE_CACHE_ENTRIES)
+def get_touch_odds(ladder, current_spx, vix, elapsed, steps, fat_tails):
+    # Fixed seed: the simulated odds only move when their inputs do
+    return line_touch_probabilities(ladder, current_spx, vix, steps, tail_df=FAT_TAIL_DF if fat_tails else None, seed=0, elapsed=elapsed)
+
+@fragment
+def render_premium_projection(signal, current_spx, ladder, elapsed, steps):
+    st.markdown("#### PREMIUM PROJECTION (Black-Scholes)")
+    vix = st.number_input("VIX (Implied Volatility %)", value=15.0, step=0.5) / 100
+    
+    if signal in ["CALL", "PUT"]:
+        strike = round((current_spx + 20) / 5) * 5 if signal == "CALL" else round((current_spx - 20) / 5) * 5
+        opt_type = 'C' if signal == "CALL" else 'P'
+        
+        prem_entry = bs_premium(current_spx, strike, ENTRY_T, 0.0525, vix, opt_type)
+        greeks = bs_chain(current_spx, strike, ENTRY_T, 0.0525, vix, opt_type)
+
+        st.markdown(f"**Target Strike:** {strike} {signal}")
+        st.markdown(f"**Estimated Entry Premium:** ${prem_entry:.2f} per share (${prem_entry * 100:.2f} per contract)")
+        st.markdown(f"**Greeks:** Δ {float(greeks['delta']):.3f} · Γ {float(greeks['gamma']):.4f} · Θ {float(greeks['theta']) / 252:.2f}/day · Vega {float(greeks['vega']) / 100:.2f}/vol pt")
+        st.plotly_chart(build_decay_figure(current_spx, strike, ENTRY_HOURS_LEFT, vix, opt_type), use_container_width=True)
+        st.session_state['premium_estimate'] = {'vix': vix, 'strike': strike, 'opt_type': opt_type, 'premium': prem_entry}
+    else:
+        st.info("Awaiting valid directional signal to calculate premiums.")
+        st.session_state['premium_estimate'] = {'vix': vix}
+
+    st.markdown("#### LINE TOUCH ODDS (to 3:00 PM CT)")
+    fat_tails = st.checkbox("Fat Tails (Monte Carlo)", help=f"Simulate 1M paths with Student-t ({FAT_TAIL_DF} df) session moves instead of the normal closed form")
+    if steps <= 0:
+        st.info("Session closed: no candles left to 3:00 PM CT.")
+        return
+    with span('touch_odds'): odds = get_touch_odds(ladder, current_spx, vix, elapsed, steps, fat_tails)
+    if odds:
+        table = pd.DataFrame({'Line': [o['label'] for o in odds], 'Level': [round(o['val'], 2) for o in odds],
+                              'Touch': [f"{o['touch']:.0%}" for o in odds], 'Close Beyond': [f"{o['close_beyond']:.0%}" for o in odds]})
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+@fragment
+def render_trade_log():
+    st.markdown("### TRADE JOURNAL")
+    c_sig, c_score = st.columns(2)
+    signal = c_sig.selectbox("Signal", ["ALL", "CALL", "PUT", "WAIT"])
+    min_score = c_score.slider("Min Confluence Score", 0, 5, 0)
+    filters = {'signal': None if signal == "ALL" else signal, 'min_score': min_score or None}
+
+    # Keyset pagination: a stack of (session_date, id) cursors, reset whenever the filters change
+    if st.session_state.get('journal_filters') != filters: st.session_state['journal_filters'], st.session_state['journal_cursors'] = filters, [None]
+    cursors = st.session_state['journal_cursors']
+    with span('journal_query'):
+        total, page, stats = count_entries(**filters), fetch_page(before=cursors[-1], limit=PAGE_SIZE + 1, **filters), win_rate_by_score(**filters)
+    has_older, page = len(page) > PAGE_SIZE, page.iloc[:PAGE_SIZE] # The extra row only tells whether an older page exists
+
+    c_total, c_page = st.columns(2)
+    with c_total: render_metric_card("Journal Entries", str(total), "#c084fc")
+    with c_page: render_metric_card("Page", str(len(cursors)), "#64748b")
+    if total == 0: st.info("No journal entries yet. Log a signal from the NY SESSION tab.")
+    elif page.empty: st.info("No older entries.")
+    else:
+        page['factors'] = [", ".join(n for i, n in enumerate(CONFLUENCE_FACTORS) if int(f) >> i & 1) if pd.notna(f) else "" for f in page['factors']]
+        st.dataframe(page[['id', 'session_date', 'signal', 'score', 'factors', 'contracts', 'strike', 'premium', 'fill_premium', 'exit_premium', 'pnl', 'outcome']],
+                     hide_index=True, use_container_width=True)
+    c_prev, c_next = st.columns(2)
+    c_prev.button("◀ Newer", disabled=len(cursors) == 1, use_container_width=True, on_click=cursors.pop)
+    c_next.button("Older ▶", disabled=not has_older, use_container_width=True, on_click=cursors.append,
+                  args=((page['session_date'].iloc[-1], int(page['id'].iloc[-1])) if not page.empty else None,))
+
+    st.markdown("#### WIN RATE BY SCORE")
+    if stats.empty: st.info("No resolved trades yet.")
+    else: st.dataframe(stats.assign(win_rate=(stats['win_rate'] * 100).round(1), avg_pnl=stats['avg_pnl'].round(2), total_pnl=stats['total_pnl'].round(2)), hide_index=True, use_container_width=True)
+
+    with st.form("journal_outcome", clear_on_submit=True):
+        st.markdown("#### RECORD FILL & OUTCOME")
+        c_id, c_fill, c_exit = st.columns(3)
+        c_id.number_input("Entry ID", min_value=1, step=1, key='outcome_id')
+        c_fill.number_input("Fill Premium ($/share)", min_value=0.0, step=0.05, key='outcome_fill')
+        c_exit.number_input("Exit Premium ($/share)", min_value=0.0, step=0.05, key='outcome_exit')
+        st.form_submit_button("Save Outcome", use_container_width=True, on_click=save_outcome) # Callback runs before the table above re-queries
+    if 'outcome_notice' in st.session_state: st.caption(st.session_state.pop('outcome_notice'))
+
+def save_outcome():
+    entry_id = st.session_state['outcome_id']
+    updated = record_outcomes([(entry_id, st.session_state['outcome_fill'], st.session_state['outcome_exit'])])
+    st.session_state['outcome_notice'] = f"Entry {entry_id} updated." if updated else f"No journal entry {entry_id}."
+
+def render_performance_panel():
+    if not metrics.METRICS_ENABLED: return
+    with st.expander("⏱️ PERFORMANCE", expanded=False):
+        hit_rate = cache_stats('get_market_data')['hit_rate']
+        render_metric_card("Data Cache Hits", f"{hit_rate:.0%}" if hit_rate is not None else "—", "#38bdf8")
+        stages = pd.DataFrame(snapshot()['stages'])
+        if not stages.empty: st.dataframe(stages[['stage', 'calls', 'last_ms', 'p50_ms', 'p95_ms']].round(2), hide_index=True, use_container_width=True)
+        st.download_button("📤 Export Metrics (Prometheus)", prometheus_text(), file_name="market_mind_metrics.prom", use_container_width=True)
+
+# --- 5. MAIN APP ---
 def main():
     inject_custom_css()
     
@@ -260,28 +323,39 @@ def main():
         target_date = st.date_input("Prior Session Anchor Date", default_date)
         manual_offset = st.number_input("ES-SPX Offset (Points)", value=0.0, step=0.25)
         st.markdown("---")
-        st.button("🔄 Force Data Refresh", use_container_width=True)
+        if st.button("🔄 Force Data Refresh", use_container_width=True):
+            try: store_sync("ES=F", force=True)
+            except Exception: pass
+            get_market_data.clear()
+        perf_slot = st.container()
+
+    with span('rerun'): render_dashboard(target_date, manual_offset)
+    with perf_slot: render_performance_panel()
+    write_metrics()
 
+def render_dashboard(target_date, manual_offset):
     tab_map, tab_asian, tab_ny, tab_log = st.tabs(["🗺️ STRUCTURAL MAP", "🌏 ASIAN SESSION (ES)", "🗽 NY SESSION (SPX)", "📓 TRADE LOG"])
-    es_data = get_market_data()
+    with tab_log: render_trade_log() # Independent of market data, so it renders even while data is missing
+    count('get_market_data.calls')
+    with span('get_market_data'): es_data = get_market_data(days=max(10, (datetime.now().date() - target_date).days + 5))
     
     if es_data is None or len(es_data) == 0:
         st.warning("Awaiting Market Data...")
         return
         
-    ny_data_raw = filter_ny_session(es_data, target_date)
+    version = data_version(es_data)
+    with span('session_analysis'): ny_data_raw, inflections = get_session_analysis(version, target_date, es_data)
     if ny_data_raw.empty:
         st.warning(f"No NY Session data found for {target_date.strftime('%Y-%m-%d')}.")
         return
 
-    inflections = detect_inflection_points(ny_data_raw)
     current_live_es = float(np.asarray(es_data['Close'])[-1])
     
     # --- TAB 1: STRUCTURAL MAP ---
     with tab_map:
         st.markdown("### PRIOR NY SESSION & CONE PROJECTION")
         target_9am = get_target_time(target_date, 9)
-        ladder = calculate_ladder(inflections, target_9am, offset=0) # Map shows raw ES
+        with span('ladder'): ladder = get_ladder(version, target_date, 9, 0.0, inflections) # Map shows raw ES
         
         c1, c2, c3, c4 = st.columns(4)
         with c1: render_metric_card("Live ES", f"{current_live_es:.2f}")
@@ -292,34 +366,18 @@ def main():
         chart_col, ladder_col = st.columns([1.5, 1])
         with chart_col:
             st.markdown("<br>", unsafe_allow_html=True)
-            fig = go.Figure(data=[go.Candlestick(x=ny_data_raw.index, open=ny_data_raw['Open'], high=ny_data_raw['High'], low=ny_data_raw['Low'], close=ny_data_raw['Close'])])
-            fig.update_layout(template="plotly_dark", margin=dict(l=0, r=0, t=0, b=0), height=600, xaxis_rangeslider_visible=False, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(fig, use_container_width=True)
+            with span('plotly_figure'): st.plotly_chart(build_session_figure(version, target_date, ny_data_raw), use_container_width=True)
         with ladder_col:
             render_spatial_ruler(ladder, current_live_es)
 
     # --- TAB 2: ASIAN SESSION ---
     with tab_asian:
         st.markdown("### PROP FIRM SCALPING FRAMEWORK (6:00 PM - 7:00 PM CT)")
-        target_6pm = get_target_time(target_date, 18)
-        asian_ladder = calculate_ladder(inflections, target_6pm, offset=0)
+        with span('ladder'): asian_ladder = get_ladder(version, target_date, 18, 0.0, inflections)
         
         col_calc, col_ladder = st.columns([1, 1.5])
         with col_calc:
-            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-            st.markdown("<h4 class='orbitron' style='color: #f59e0b;'>RISK CALCULATOR</h4>", unsafe_allow_html=True)
-            daily_limit = st.number_input("Prop Firm Daily Loss Limit ($)", value=2500, step=100)
-            risk_pct = st.slider("Max Risk per Trade (%)", 1, 10, 3)
-            stop_pts = st.number_input("Stop Loss Distance (Points)", value=5.0, step=0.5)
-            pt_value = 50.0 # ES Point Value
-            
-            max_risk_dollars = daily_limit * (risk_pct / 100)
-            risk_per_contract = stop_pts * pt_value
-            max_contracts = math.floor(max_risk_dollars / risk_per_contract) if risk_per_contract > 0 else 0
-            
-            st.markdown("---")
-            render_metric_card("Max Contracts (ES)", str(max_contracts), "#10b981" if max_contracts > 0 else "#e11d48")
-            st.markdown("</div>", unsafe_allow_html=True)
+            render_risk_calculator()
             
         with col_ladder:
             st.markdown("<h4 class='orbitron'>6:00 PM ES PROJECTION</h4>", unsafe_allow_html=True)
@@ -329,41 +387,23 @@ def main():
     with tab_ny:
         st.markdown("### SPX 0DTE OPTIONS ENGINE (9:00 AM CT)")
         current_spx = current_live_es - manual_offset
-        ny_ladder = calculate_ladder(inflections, target_9am, offset=manual_offset)
+        with span('ladder'): ny_ladder = get_ladder(version, target_date, 9, manual_offset, inflections)
         
         signal, reason, css_class = generate_ny_signal(ny_ladder, current_spx)
+        st.session_state['ny_signal'] = {'session_date': target_date.isoformat(), 'target_time': target_9am.isoformat(), 'signal': signal,
+                                         'reason': reason, 'price': current_spx, 'es_offset': manual_offset}
         
         st.markdown(f"<div class='{css_class}'><h2 class='orbitron' style='margin:0;'>SIGNAL: {signal}</h2><p class='rajdhani' style='margin:5px 0 0 0; font-size:1.2rem;'>{reason}</p></div><br>", unsafe_allow_html=True)
         
         c_conf, c_options = st.columns(2)
         with c_conf:
-            st.markdown("#### 5-FACTOR CONFLUENCE")
-            f1 = st.checkbox("1. Asian Alignment (+1)", help="Did Asian session trade in the same direction as the NY signal?")
-            f2 = st.checkbox("2. London Sweep Confirmed (+1)", help="Did London sweep Asian highs/lows before reversing?")
-            f3 = st.checkbox("3. 8:30 AM Data Absorbed/Aligned (+1)", help="Did economic data move in trade direction?")
-            f4 = st.checkbox("4. Opening Drive Aligned (+1)", help="Is the first 15-min candle driving in trade direction?")
-            f5 = st.checkbox("5. Line Cluster (+1)", help="Are 3+ lines within 15pts?")
-            
-            score = sum([f1, f2, f3, f4, f5])
-            size = "100% (3 Contracts)" if score >= 4 else "75% (2 Contracts)" if score >= 3 else "50% (1 Contract)" if score >= 2 else "NO TRADE"
-            color = "#10b981" if score >= 3 else "#f59e0b" if score >= 2 else "#e11d48"
-            render_metric_card(f"Score: {score}/5", f"Position: {size}", color)
-
+            render_confluence_panel()
+            render_journal_logger()
         with c_options:
-            st.markdown("#### PREMIUM PROJECTION (Black-Scholes)")
-            vix = st.number_input("VIX (Implied Volatility %)", value=15.0, step=0.5) / 100
-            
-            if signal in ["CALL", "PUT"]:
-                strike = round((current_spx + 20) / 5) * 5 if signal == "CALL" else round((current_spx - 20) / 5) * 5
-                time_entry = 6.0 / 24.0 # Roughly 6 hours left in session
-                opt_type = 'C' if signal == "CALL" else 'P'
-                
-                prem_entry = bs_premium(current_spx, strike, time_entry, 0.0525, vix, opt_type)
-                
-                st.markdown(f"**Target Strike:** {strike} {signal}")
-                st.markdown(f"**Estimated Entry Premium:** ${prem_entry:.2f} per share (${prem_entry * 100:.2f} per contract)")
-            else:
-                st.info("Awaiting valid directional signal to calculate premiums.")
+            # Touch odds cover what is left of the session: from now (9:00 before the open) to 3:00 PM, lines moved to now
+            odds_from = max(datetime.now(CT_TZ), target_9am)
+            elapsed, remaining = count_candles_between(target_9am, odds_from), count_candles_between(odds_from, get_target_time(target_date, 15))
+            render_premium_projection(signal, current_spx, ny_ladder, elapsed, remaining)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import scipy.stats # noqa: F401 - bs_premium imports it lazily; loading it here lets forked workers inherit it
+
+from market_engine import (CT_TZ, ENTRY_T, bs_premium, calculate_ladder, detect_inflection_points_batch, generate_ny_signal,
+                           get_target_time, inflections_for_date)
+
+# --- 1. BACKTEST CONSTANTS ---
+ENTRY_HOUR = 9
+EXIT_HOUR = 15
+RISK_FREE_RATE = 0.0525
+STRIKE_DISTANCE = 20
+CHUNK_SESSIONS = 64
+
+# --- 2. HISTORY LOADING ---
+def load_history(path):
+    df = pd.read_parquet(path) if str(path).endswith('.parquet') else pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True).tz_convert(CT_TZ)
+    return df.sort_index()[['Open', 'High', 'Low', 'Close']]
+
+def session_dates(df):
+    return sorted(set(df.index.date))
+
+# --- 3. SESSION REPLAY ---
+def reason_key(reason):
+    # "Trapped between Resistance (B3) and Support (R2)" -> "(B) ... (R)" so numbered lines share one bucket
+    return re.sub(r'\(([A-Z])\d+\)', r'(\1)', reason)
+
+def score_session(frame, inflections, anchor_date, offset=0.0, vol=0.15):
+    if inflections is None: return None
+    target = get_target_time(anchor_date, ENTRY_HOUR)
+    live = frame.loc[target:get_target_time(anchor_date, EXIT_HOUR)]
+    if live.empty: return None
+    entry, exit_ = float(live['Open'].iloc[0]) - offset, float(live['Close'].iloc[-1]) - offset
+    ladder = calculate_ladder(inflections, target, offset=offset)
+    signal, reason, _ = generate_ny_signal(ladder, entry)
+    rec = {'date': anchor_date, 'target_time': target, 'entry': entry, 'exit': exit_, 'signal': signal, 'reason': reason,
+           'strike': np.nan, 'prem_entry': np.nan, 'prem_exit': np.nan, 'pnl': np.nan, 'hit': np.nan}
+    if signal in ["CALL", "PUT"]:
+        strike = round((entry + STRIKE_DISTANCE) / 5) * 5 if signal == "CALL" else round((entry - STRIKE_DISTANCE) / 5) * 5
+        opt_type = 'C' if signal == "CALL" else 'P'
+        prem_entry = bs_premium(entry, strike, ENTRY_T, RISK_FREE_RATE, vol, opt_type)
+        prem_exit = bs_premium(exit_, strike, 0.0, RISK_FREE_RATE, vol, opt_type)
+        rec.update({'strike': strike, 'prem_entry': prem_entry, 'prem_exit': prem_exit, 'pnl': (prem_exit - prem_entry) * 100,
+                    'hit': float(exit_ > entry if signal == "CALL" else exit_ < entry)})
+    return rec
+
+def replay_chunk(frame, dates, offset=0.0, vol=0.15):
+    batch = detect_inflection_points_batch(frame)
+    records = [score_session(frame, inflections_for_date(batch, d), d, offset, vol) for d in dates]
+    return pd.DataFrame([r for r in records if r is not None])
+
+# --- 4. PARALLEL DRIVER & CHECKPOINTS ---
+def _chunk_frame(df, dates):
+    # Anchor sessions plus the following trading day that gets scored
+    end = get_target_time(dates[-1], 0) + timedelta(days=1)
+    return df.loc[str(dates[0]):end.strftime('%Y-%m-%d')]
+
+def _fingerprint(frame):
+    return hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes()).hexdigest()[:10]
+
+def _checkpoint_path(checkpoint_dir, dates, params, frame):
+    # Keyed on the parameters and a fingerprint of the chunk's bars, so a different or extended history
+    # (e.g. the next-day session of the last anchor arriving) never reuses a stale result
+    tag = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    return os.path.join(checkpoint_dir, tag, f"{dates[0]:%Y%m%d}_{dates[-1]:%Y%m%d}_{_fingerprint(frame)}.pkl")
+
+def chunk_frames(df, chunk_sessions=CHUNK_SESSIONS):
+    """(anchor dates, bars) for each run of chunk_sessions sessions of df."""
+    dates = session_dates(df)
+    return [(chunk, _chunk_frame(df, chunk)) for chunk in (dates[i:i + chunk_sessions] for i in range(0, len(dates), chunk_sessions))]
+
+def run_chunks(fn, jobs, checkpoint_dir=None, workers=None):
+    """Runs fn(frame, dates, *args) for every (frame, dates, args, params) job across a process pool and returns the
+    non-empty results. Jobs already checkpointed under their params and bars in checkpoint_dir are loaded instead."""
+    results, pending = [], []
+    for frame, dates, args, params in jobs:
+        path = _checkpoint_path(checkpoint_dir, dates, params, frame) if checkpoint_dir else None
+        if path and os.path.exists(path): results.append(pd.read_pickle(path))
+        else: pending.append((frame, dates, args, path))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, frame, dates, *args): path for frame, dates, args, path in pending}
+        for fut in as_completed(futures):
+            res, path = fut.result(), futures[fut]
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                res.to_pickle(path + '.tmp')
+                os.replace(path + '.tmp', path)
+            results.append(res)
+    return [r for r in results if not r.empty]
+
+def run_backtest(df, offset=0.0, vol=0.15, workers=None, chunk_sessions=CHUNK_SESSIONS, checkpoint_dir=None):
+    """Replays every session of df through the NY pipeline across a process pool.
+    Chunks already present in checkpoint_dir are loaded instead of recomputed."""
+    params = {'offset': offset, 'vol': vol, 'time_entry': ENTRY_T, 'chunk_sessions': chunk_sessions}
+    jobs = [(frame, chunk, (offset, vol), params) for chunk, frame in chunk_frames(df, chunk_sessions)]
+    results = run_chunks(replay_chunk, jobs, checkpoint_dir, workers)
+    return pd.concat(results, ignore_index=True).sort_values('date', ignore_index=True) if results else pd.DataFrame()
+
+def summarize(trades):
+    if trades.empty: return pd.DataFrame(columns=['signal', 'reason', 'sessions', 'hit_rate', 'expectancy'])
+    trades = trades.assign(reason=trades['reason'].map(reason_key))
+    return trades.groupby(['signal', 'reason']).agg(sessions=('date', 'size'), hit_rate=('hit', 'mean'), expectancy=('pnl', 'mean')).reset_index().sort_values('sessions', ascending=False, ignore_index=True)
+
+# --- 5. CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Replay the NY signal over a local 30m history.")
+    parser.add_argument('history', help="CSV or Parquet with a datetime index and Open/High/Low/Close columns")
+    parser.add_argument('--offset', type=float, default=0.0)
+    parser.add_argument('--vol', type=float, default=0.15)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-sessions', type=int, default=CHUNK_SESSIONS)
+    parser.add_argument('--checkpoint-dir', default=None)
+    parser.add_argument('--trades-out', default=None)
+    args = parser.parse_args()
+
+    trades = run_backtest(load_history(args.history), args.offset, args.vol, args.workers, args.chunk_sessions, args.checkpoint_dir)
+    if args.trades_out: trades.to_csv(args.trades_out, index=False)
+    print(summarize(trades).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
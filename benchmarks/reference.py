@@ -0,0 +1,42 @@
+# Reference copies of the original scalar implementations, kept verbatim so optimized versions can be cross-checked.
+from datetime import timedelta
+
+import numpy as np
+
+from market_engine import CANDLE_MINUTES, CT_TZ, MAINTENANCE_END_HOUR, MAINTENANCE_START_HOUR
+
+def count_candles_between(start_dt, end_dt):
+    if start_dt.tzinfo is None: start_dt = CT_TZ.localize(start_dt)
+    if end_dt.tzinfo is None: end_dt = CT_TZ.localize(end_dt)
+    if start_dt >= end_dt: return 0
+    candle_count = 0
+    current_time = start_dt
+    while current_time < end_dt:
+        wd, hr = current_time.weekday(), current_time.hour
+        is_maint = (hr >= MAINTENANCE_START_HOUR and hr < MAINTENANCE_END_HOUR)
+        is_sat = (wd == 5)
+        is_sun_pre = (wd == 6 and hr < MAINTENANCE_END_HOUR)
+        is_fri_post = (wd == 4 and hr >= MAINTENANCE_START_HOUR)
+        if not (is_maint or is_sat or is_sun_pre or is_fri_post): candle_count += 1
+        current_time += timedelta(minutes=CANDLE_MINUTES)
+    return candle_count
+
+def detect_inflection_points(ny_data):
+    if ny_data.empty or len(ny_data) < 2: return None
+    bounces, rejections = [], []
+    closes, times = np.asarray(ny_data['Close']), ny_data.index
+    n = len(closes)
+    for i in range(n):
+        if i == 0:
+            if closes[0] < closes[1]: bounces.append({'time': times[0], 'price': closes[0]})
+            if closes[0] > closes[1]: rejections.append({'time': times[0], 'price': closes[0]})
+        elif i == n - 1:
+            if closes[n-1] < closes[n-2]: bounces.append({'time': times[n-1], 'price': closes[n-1]})
+            if closes[n-1] > closes[n-2]: rejections.append({'time': times[n-1], 'price': closes[n-1]})
+        else:
+            if closes[i] < closes[i-1] and closes[i] < closes[i+1]: bounces.append({'time': times[i], 'price': closes[i]})
+            if closes[i] > closes[i-1] and closes[i] > closes[i+1]: rejections.append({'time': times[i], 'price': closes[i]})
+    bearish, bullish = ny_data[ny_data['Close'] < ny_data['Open']], ny_data[ny_data['Close'] > ny_data['Open']]
+    hw = {'time': bearish['High'].idxmax(), 'price': bearish.loc[bearish['High'].idxmax(), 'High']} if not bearish.empty else None
+    lw = {'time': bullish['Low'].idxmin(), 'price': bullish.loc[bullish['Low'].idxmin(), 'Low']} if not bullish.empty else None
+    return {'bounces': bounces, 'rejections': rejections, 'hw': hw, 'lw': lw}
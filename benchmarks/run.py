@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from backtest import ENTRY_HOUR, EXIT_HOUR, replay_chunk
+from benchmarks import reference
+from benchmarks.synthetic import DST_START, synthetic_es_bars, synthetic_inflections
+from market_engine import (CT_TZ, RATE_PER_CANDLE, bs_chain, bs_premium, calculate_ladder, calculate_ladder_grid,
+                           candle_sigma, count_candles_between, count_candles_between_batch, detect_inflection_points,
+                           detect_inflection_points_batch, filter_ny_session, generate_ny_signal, get_session_target_times,
+                           get_target_time, inflections_for_date, ladder_from_grid, project_line_value, simulate_touches,
+                           touch_probabilities)
+from sweep import DEFAULT_RATES, DEFAULT_TARGETS, backtest_counts, sweep_chunk
+
+# --- 1. CASE REGISTRY ---
+# Each case takes a size and returns (run, check): `run` is the timed workload, `check` cross-validates the
+# output against the reference implementation on the same input and returns False on a mismatch.
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+CASES = {}
+
+def case(*sizes):
+    def register(fn):
+        CASES[fn.__name__.replace('bench_', '')] = (sizes, fn)
+        return fn
+    return register
+
+def _anchor_pairs(span_days, n=100):
+    starts = pd.date_range(pd.Timestamp(f'{DST_START} 08:30').tz_localize(CT_TZ), periods=n, freq='30min')
+    return [(s, s + pd.Timedelta(days=span_days)) for s in starts]
+
+_history_cache = {}
+def _history(sessions):
+    if sessions not in _history_cache: _history_cache[sessions] = synthetic_es_bars(sessions)
+    return _history_cache[sessions]
+
+def _session_dates(df, sessions):
+    return sorted(d for d in set(df.index.date) if d.weekday() < 5)[:sessions]
+
+# --- 2. CASES ---
+@case(1, 5, 30, 365, 3650)
+def bench_count_candles_between(span_days):
+    pairs = _anchor_pairs(span_days)
+    return (lambda: [count_candles_between(s, e) for s, e in pairs],
+            lambda: all(count_candles_between(s, e) == reference.count_candles_between(s, e) for s, e in pairs[::33]))
+
+@case(10, 1_000, 100_000)
+def bench_count_candles_between_batch(n):
+    starts = pd.date_range(pd.Timestamp(f'{DST_START} 08:30').tz_localize(CT_TZ), periods=n, freq='30min')
+    target = get_target_time(starts[-1].date(), 9)
+    sample = range(0, n, max(1, n // 20))
+    return (lambda: count_candles_between_batch(starts, target),
+            lambda: all(count_candles_between_batch(starts, target)[i] == reference.count_candles_between(starts[i], target) for i in sample))
+
+@case(10, 100, 1_000, 10_000)
+def bench_project_line_value(n):
+    anchors = [(p, s) for p, (s, _) in zip(np.linspace(1900, 2100, n), _anchor_pairs(0, n))]
+    target = get_target_time(anchors[-1][1].date(), 9)
+    ref = lambda p, t: p + RATE_PER_CANDLE * reference.count_candles_between(t, target)
+    return (lambda: [project_line_value(p, t, target, True) for p, t in anchors],
+            lambda: all(project_line_value(p, t, target, True) == ref(p, t) for p, t in anchors[::max(1, n // 10)]))
+
+@case(1, 20, 250, 2_500)
+def bench_detect_inflection_points(sessions):
+    df = _history(sessions)
+    dates = _session_dates(df, sessions)
+    step = max(1, sessions // 50)
+    return (lambda: [detect_inflection_points(filter_ny_session(df, d)) for d in dates],
+            lambda: all(detect_inflection_points(filter_ny_session(df, d)) == reference.detect_inflection_points(filter_ny_session(df, d)) for d in dates[::step]))
+
+@case(1, 20, 250, 2_500)
+def bench_detect_inflection_points_batch(sessions):
+    df = _history(sessions)
+    dates = _session_dates(df, sessions)
+    step = max(1, sessions // 50)
+    def check():
+        batch = detect_inflection_points_batch(df)
+        return all(inflections_for_date(batch, d) == reference.detect_inflection_points(filter_ny_session(df, d)) for d in dates[::step])
+    return lambda: detect_inflection_points_batch(df), check
+
+@case(10, 100, 1_000, 10_000)
+def bench_calculate_ladder(lines):
+    inflections = synthetic_inflections(lines)
+    target = get_target_time(inflections['hw']['time'].date(), 9)
+    grid = lambda: ladder_from_grid(calculate_ladder_grid(inflections, [target], [0.0]), target, 0.0)
+    return lambda: calculate_ladder(inflections, target), lambda: calculate_ladder(inflections, target) == grid()
+
+@case(10, 100, 1_000, 10_000)
+def bench_calculate_ladder_grid(lines):
+    inflections = synthetic_inflections(lines)
+    session_date = inflections['hw']['time'].date()
+    targets, offsets = get_session_target_times(session_date), [0.0, 5.0, 10.0]
+    def check():
+        grid = calculate_ladder_grid(inflections, targets, offsets)
+        return all(ladder_from_grid(grid, t, o) == calculate_ladder(inflections, t, o) for t in targets[::5] for o in offsets)
+    return lambda: calculate_ladder_grid(inflections, targets, offsets), check
+
+@case(10, 100, 1_000, 10_000)
+def bench_generate_ny_signal(lines):
+    inflections = synthetic_inflections(lines)
+    ladder = calculate_ladder(inflections, get_target_time(inflections['hw']['time'].date(), 9))
+    prices = np.linspace(ladder[-1]['val'] - 10, ladder[0]['val'] + 10, 100)
+    return lambda: [generate_ny_signal(ladder, p) for p in prices], None
+
+@case(10, 1_000, 10_000)
+def bench_bs_premium(n):
+    strikes = np.linspace(1800, 2200, n)
+    ref = lambda: np.array([bs_premium(2000.0, k, 0.25, 0.0525, 0.15, 'C') for k in strikes])
+    return ref, lambda: np.allclose(bs_chain(2000.0, strikes, 0.25, 0.0525, 0.15, 'C')['premium'], ref(), rtol=0, atol=1e-9)
+
+@case(10, 1_000, 10_000, 1_000_000)
+def bench_bs_chain(n):
+    strikes = np.linspace(1800, 2200, n)
+    sample = strikes[::max(1, n // 100)]
+    def check():
+        vec = bs_chain(2000.0, sample, 0.25, 0.0525, 0.15, 'P')['premium']
+        return np.allclose(vec, [bs_premium(2000.0, k, 0.25, 0.0525, 0.15, 'P') for k in sample], rtol=0, atol=1e-9)
+    return lambda: bs_chain(2000.0, strikes, 0.25, 0.0525, 0.15, 'P'), check
+
+@case(10_000, 100_000, 1_000_000)
+def bench_simulate_touches(n_paths):
+    gaps, slopes = np.linspace(-40, 40, 13), np.where(np.arange(13) % 2, RATE_PER_CANDLE, -RATE_PER_CANDLE)
+    sigma = candle_sigma(2000.0, 0.15)
+    def check():
+        touch, close = simulate_touches(gaps, slopes, sigma, 12, max(n_paths, 200_000), seed=0)
+        exact_touch, exact_close = touch_probabilities(gaps, slopes, sigma, 12)
+        return np.allclose(close, exact_close, atol=0.005) and np.allclose(touch, exact_touch, atol=0.015) # Touches: BGK approximation
+    return lambda: simulate_touches(gaps, slopes, sigma, 12, n_paths, seed=0), check
+
+@case(10, 100, 1_000, 10_000)
+def bench_render_spatial_ruler(lines):
+    from Market_Mind2 import build_spatial_ruler_html # Pulls in Streamlit; only this case needs it
+    build = getattr(build_spatial_ruler_html, '__wrapped__', build_spatial_ruler_html) # Bypass st.cache_data
+    inflections = synthetic_inflections(lines)
+    ladder = calculate_ladder(inflections, get_target_time(inflections['hw']['time'].date(), 9))
+    return lambda: build(ladder, 2000.0), lambda: build(ladder, 2000.0).count('translateY(-50%)') == len(ladder) + 1
+
+@case(20, 250, 2_500)
+def bench_sweep_chunk(sessions):
+    df = _history(sessions)
+    dates = _session_dates(df, sessions)
+    def check():
+        # The RATE_PER_CANDLE row of the NY window must count exactly what the scalar backtest replay scores
+        res = sweep_chunk(df, dates, 30, ('08:30', '15:00'), [(ENTRY_HOUR, EXIT_HOUR)], [RATE_PER_CANDLE]).iloc[0]
+        expected = backtest_counts(replay_chunk(df, dates))
+        return all(res[c] == v for c, v in expected.items() if c != 'edge') and np.isclose(res['edge'], expected['edge'])
+    return lambda: sweep_chunk(df, dates, 30, ('08:30', '15:00'), DEFAULT_TARGETS, DEFAULT_RATES), check
+
+# --- 3. RUNNER ---
+def run_cases(names, quick=False, repeat=5):
+    results, failures = {}, []
+    for name in names:
+        sizes, setup = CASES[name]
+        for size in sizes[:3] if quick else sizes:
+            run, check = setup(size)
+            if check is not None and not check(): failures.append(f'{name}[{size}]')
+            reps = repeat if size == sizes[0] or size != sizes[-1] else max(1, repeat // 2)
+            results.setdefault(name, {})[str(size)] = min(timeit.repeat(run, number=1, repeat=reps))
+            print(f'{name:<36} {size:>10}  {results[name][str(size)] * 1e3:>11.3f} ms', flush=True)
+    return results, failures
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, by_size in results.items():
+        for size, secs in by_size.items():
+            base = baseline.get('results', {}).get(name, {}).get(size)
+            if base and secs > base * (1 + tolerance): regressions.append((name, size, base, secs))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the core hot paths on synthetic ES data and compare against a stored baseline.")
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), default=None)
+    parser.add_argument('--quick', action='store_true', help="Only the three smallest sizes of each case")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown vs baseline before flagging")
+    parser.add_argument('--metrics', action='store_true', help="Keep pipeline instrumentation on, to measure its overhead")
+    args = parser.parse_args(argv)
+    metrics.set_enabled(args.metrics)
+
+    results, failures = run_cases(args.only or list(CASES), args.quick, args.repeat)
+    for f in failures: print(f'MISMATCH vs reference: {f}')
+    if args.save_baseline:
+        baseline = {'python': sys.version.split()[0], 'machine': platform.machine(), 'numpy': np.__version__, 'pandas': pd.__version__, 'results': results}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f: old = json.load(f)
+            for name, by_size in old.get('results', {}).items(): baseline['results'].setdefault(name, by_size)
+        with open(args.baseline, 'w') as f: json.dump(baseline, f, indent=2)
+        print(f'Baseline written to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f: regressions = compare(results, json.load(f), args.tolerance)
+        for name, size, base, secs in regressions: print(f'REGRESSION {name}[{size}]: {base * 1e3:.3f} ms -> {secs * 1e3:.3f} ms ({secs / base:.2f}x)')
+        if regressions: return 1
+    else: print(f'No baseline at {args.baseline}, so regressions were not checked; run with --save-baseline to record one')
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# Deterministic synthetic ES=F 30m bars on the Globex calendar: closed Friday 16:00 -> Sunday 17:00 and during the
+# daily 16:00-17:00 maintenance hour, in US/Central wall time so every DST change shows up as a 23h/25h Sunday.
+import numpy as np
+import pandas as pd
+
+from market_engine import CT_TZ, is_trading_slot
+
+DST_START = '2015-03-02' # Monday before the 2015-03-08 spring-forward, so even short histories cross a DST change
+
+def synthetic_es_bars(sessions=5, start=DST_START, seed=0, base=2000.0, vol=2.5):
+    """At least `sessions` weekday sessions of OHLCV bars from start (a date), same output for the same seed."""
+    rng = np.random.default_rng(seed)
+    days = int(sessions * 7 / 5) + 3
+    idx = pd.date_range(pd.Timestamp(start).tz_localize(CT_TZ), periods=days * 48, freq='30min')
+    idx = idx[[is_trading_slot(wd, hr) for wd, hr in zip(idx.weekday, idx.hour)]]
+    close = base + np.cumsum(rng.normal(0, vol, len(idx)))
+    open_ = np.concatenate(([base], close[:-1])) + rng.normal(0, vol / 4, len(idx))
+    high = np.maximum(open_, close) + rng.exponential(vol / 2, len(idx))
+    low = np.minimum(open_, close) - rng.exponential(vol / 2, len(idx))
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': rng.integers(100, 5000, len(idx)).astype(float)}, index=idx)
+
+def synthetic_inflections(lines, session_date='2015-03-06', seed=0, base=2000.0):
+    """An inflection dict with `lines` anchors (HW/LW plus bounces and rejections) spread over one NY session."""
+    rng = np.random.default_rng(seed)
+    session = pd.date_range(pd.Timestamp(f'{session_date} 08:30').tz_localize(CT_TZ), periods=14, freq='30min')
+    n_b = max(0, lines - 2) // 2
+    pts = lambda n: [{'time': session[i % 14], 'price': float(p)} for i, p in enumerate(base + rng.normal(0, 10, n))]
+    return {'bounces': pts(n_b), 'rejections': pts(max(0, lines - 2) - n_b),
+            'hw': {'time': session[3], 'price': base + 15.0}, 'lw': {'time': session[9], 'price': base - 15.0}}
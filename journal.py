@@ -0,0 +1,167 @@
+# Trade journal: each logged NY signal with its confluence factors, sizing and premium estimate, plus the fill and
+# outcome recorded later. Embedded SQLite, so the TRADE LOG tab pages and aggregates in SQL instead of in pandas.
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from market_engine import STORE_DIR
+
+# --- 1. SCHEMA ---
+JOURNAL_PATH = os.environ.get('MARKET_JOURNAL', os.path.join(STORE_DIR, 'journal.sqlite'))
+JOURNAL_BATCH_SIZE = 500
+PAGE_SIZE = 50
+CONFLUENCE_FACTORS = ['Asian Alignment', 'London Sweep', '8:30 Data', 'Opening Drive', 'Line Cluster'] # Bit i of `factors`
+ENTRY_COLUMNS = ['logged_at', 'session_date', 'target_time', 'signal', 'reason', 'price', 'es_offset', 'vix', 'score', 'factors',
+                 'contracts', 'strike', 'opt_type', 'premium', 'fill_premium', 'exit_premium', 'pnl', 'outcome', 'source']
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    logged_at TEXT NOT NULL,
+    session_date TEXT NOT NULL,
+    target_time TEXT,
+    signal TEXT NOT NULL,
+    reason TEXT,
+    price REAL,
+    es_offset REAL,
+    vix REAL,
+    score INTEGER,
+    factors INTEGER,
+    contracts INTEGER,
+    strike REAL,
+    opt_type TEXT,
+    premium REAL,
+    fill_premium REAL,
+    exit_premium REAL,
+    pnl REAL,
+    outcome TEXT,
+    source TEXT NOT NULL DEFAULT 'app'
+);
+CREATE INDEX IF NOT EXISTS idx_signals_date ON signals(session_date, id);
+CREATE INDEX IF NOT EXISTS idx_signals_signal ON signals(signal, session_date, id);
+CREATE INDEX IF NOT EXISTS idx_signals_score ON signals(score, outcome, pnl);
+"""
+# Score buckets follow the confluence sizing tiers
+SCORE_BUCKET = "CASE WHEN score IS NULL THEN 'n/a' WHEN score >= 4 THEN '4-5' WHEN score = 3 THEN '3' WHEN score = 2 THEN '2' ELSE '0-1' END"
+
+_initialized = set()
+
+def _connect(path=JOURNAL_PATH):
+    if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA synchronous=NORMAL") # Safe under WAL; commits skip the fsync per transaction
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL") # Readers (other sessions) never block the writer
+        conn.executescript(SCHEMA)
+        _initialized.add(path)
+    return conn
+
+def _where(signal=None, min_score=None, start=None, end=None, resolved=None):
+    clauses, params = [], []
+    if signal: clauses, params = clauses + ["signal = ?"], params + [signal]
+    if min_score is not None: clauses, params = clauses + ["score >= ?"], params + [min_score]
+    if start: clauses, params = clauses + ["session_date >= ?"], params + [str(start)]
+    if end: clauses, params = clauses + ["session_date <= ?"], params + [str(end)]
+    if resolved: clauses.append("outcome IS NOT NULL")
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+# --- 2. WRITES ---
+def record_signals(entries, path=JOURNAL_PATH):
+    """Inserts journal entries (dicts keyed by ENTRY_COLUMNS; missing keys are NULL) in one transaction."""
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    rows = [tuple(e.get(c, now if c == 'logged_at' else 'app' if c == 'source' else None) for c in ENTRY_COLUMNS) for e in entries]
+    if not rows: return 0
+    conn = _connect(path)
+    try:
+        with conn: conn.executemany(f"INSERT INTO signals ({', '.join(ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(ENTRY_COLUMNS))})", rows)
+    finally: conn.close()
+    return len(rows)
+
+def record_outcomes(updates, path=JOURNAL_PATH):
+    """Fills in (id, fill_premium, exit_premium) for logged entries; pnl and WIN/LOSS/SCRATCH are derived in SQL.
+    Entries sized at 0 contracts (NO TRADE) keep the premiums but no pnl or outcome, so they stay out of the stats."""
+    rows = [{'id': int(i), 'fill': float(f), 'exit': float(x)} for i, f, x in updates]
+    if not rows: return 0
+    conn = _connect(path)
+    try:
+        with conn:
+            cur = conn.executemany("""UPDATE signals SET fill_premium = :fill, exit_premium = :exit,
+                                      pnl = CASE WHEN COALESCE(contracts, 1) > 0 THEN (:exit - :fill) * 100 * COALESCE(contracts, 1) END,
+                                      outcome = CASE WHEN COALESCE(contracts, 1) <= 0 THEN NULL WHEN :exit > :fill THEN 'WIN' WHEN :exit < :fill THEN 'LOSS' ELSE 'SCRATCH' END
+                                      WHERE id = :id""", rows)
+        return cur.rowcount
+    finally: conn.close()
+
+class JournalWriter:
+    """Buffers entries and writes them JOURNAL_BATCH_SIZE at a time; use as a context manager to flush the tail."""
+    def __init__(self, path=JOURNAL_PATH, batch_size=JOURNAL_BATCH_SIZE):
+        self.path, self.batch_size, self.buffer, self.written = path, batch_size, [], 0
+
+    def add(self, entry):
+        self.buffer.append(entry)
+        if len(self.buffer) >= self.batch_size: self.flush()
+
+    def flush(self):
+        self.written += record_signals(self.buffer, self.path)
+        self.buffer = []
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.flush()
+
+def import_trades(trades, path=JOURNAL_PATH):
+    """Loads backtest.run_backtest trades (one contract each) as resolved journal entries."""
+    with JournalWriter(path) as writer:
+        for t in trades.itertuples(index=False):
+            directional = t.signal in ("CALL", "PUT")
+            writer.add({'session_date': str(t.date), 'target_time': str(t.target_time), 'signal': t.signal, 'reason': t.reason, 'price': t.entry,
+                        'contracts': 1 if directional else 0, 'strike': t.strike if directional else None, 'opt_type': t.signal[0] if directional else None,
+                        'premium': t.prem_entry if directional else None, 'fill_premium': t.prem_entry if directional else None,
+                        'exit_premium': t.prem_exit if directional else None, 'pnl': t.pnl if directional else None,
+                        'outcome': ('WIN' if t.pnl > 0 else 'LOSS' if t.pnl < 0 else 'SCRATCH') if directional else None, 'source': 'backtest'})
+    return writer.written
+
+# --- 3. QUERIES ---
+def fetch_page(before=None, limit=PAGE_SIZE, path=JOURNAL_PATH, **filters):
+    """Newest-first page of entries. `before` is the (session_date, id) of the previous page's last row (keyset
+    pagination), so every page is an index range scan however deep it is."""
+    where, params = _where(**filters)
+    if before is not None:
+        where += (" AND " if where else " WHERE ") + "(session_date, id) < (?, ?)"
+        params += list(before)
+    conn = _connect(path)
+    try: return pd.read_sql_query(f"SELECT * FROM signals{where} ORDER BY session_date DESC, id DESC LIMIT ?", conn, params=params + [limit])
+    finally: conn.close()
+
+def count_entries(path=JOURNAL_PATH, **filters):
+    where, params = _where(**filters)
+    conn = _connect(path)
+    try: return conn.execute(f"SELECT COUNT(*) FROM signals{where}", params).fetchone()[0]
+    finally: conn.close()
+
+def win_rate_by_score(path=JOURNAL_PATH, **filters):
+    """Resolved trades per confluence score bucket: count, win rate, average and total P&L."""
+    where, params = _where(resolved=True, **filters)
+    conn = _connect(path)
+    try:
+        return pd.read_sql_query(f"""SELECT {SCORE_BUCKET} AS score_bucket, COUNT(*) AS trades, SUM(outcome = 'WIN') AS wins,
+                                     AVG(outcome = 'WIN') AS win_rate, AVG(pnl) AS avg_pnl, SUM(pnl) AS total_pnl
+                                     FROM signals{where} GROUP BY score_bucket ORDER BY score_bucket""", conn, params=params)
+    finally: conn.close()
+
+# --- 4. CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the trade journal or load backtest trades into it.")
+    parser.add_argument('--journal', default=JOURNAL_PATH)
+    parser.add_argument('--import-trades', default=None, help="CSV written by backtest.py --trades-out")
+    parser.add_argument('--signal', choices=['CALL', 'PUT', 'WAIT'], default=None)
+    args = parser.parse_args()
+
+    if args.import_trades:
+        print(f"Imported {import_trades(pd.read_csv(args.import_trades), args.journal)} entries")
+    print(f"{count_entries(args.journal, signal=args.signal)} entries")
+    print(win_rate_by_score(args.journal, signal=args.signal).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import csv
+import json
+import sys
+
+import pandas as pd
+
+from market_engine import (CT_TZ, calculate_ladder_grid, detect_inflection_points_batch, generate_ny_signal, get_target_time,
+                           inflections_for_date, ladder_from_grid, make_file_fetcher, store_read, store_sync)
+
+LINE_FIELDS = ['label', 'name', 'dir', 'val', 'is_key']
+SIGNAL_FIELDS = ['symbol', 'date', 'target_time', 'offset', 'price', 'signal', 'reason']
+
+def load_symbol(symbol, files=None, sync=False):
+    if files: return make_file_fetcher(files)(symbol).tz_convert(CT_TZ)
+    if sync: store_sync(symbol, force=True)
+    return store_read(symbol)
+
+def compute_signals(df, symbol, dates=None, hours=(9,), offsets=(0.0,), price_at='live'):
+    """Ladders and NY signals for every (date, target hour, offset) of one symbol's history."""
+    batch = detect_inflection_points_batch(df)
+    sessions = dict(tuple(batch.groupby('date', sort=False)))
+    live = float(df['Close'].iloc[-1])
+    records = []
+    for d in (dates if dates is not None else sorted(batch.attrs['sessions'].astype(object))):
+        inflections = inflections_for_date(sessions.get(d, batch.iloc[:0]), d) # No rows: a flat session or none at all
+        if inflections is None: continue
+        targets = [get_target_time(d, h) for h in hours]
+        grid = calculate_ladder_grid(inflections, targets, offsets)
+        for target in targets:
+            bar = df.loc[target:target] if price_at == 'target' else None
+            if bar is not None and bar.empty: continue # No bar at the target time to price against
+            es_price = float(bar['Open'].iloc[0]) if bar is not None else live
+            for offset in offsets:
+                ladder = ladder_from_grid(grid, target, offset)
+                signal, reason, _ = generate_ny_signal(ladder, es_price - offset)
+                records.append({'symbol': symbol, 'date': d.isoformat(), 'target_time': target.isoformat(), 'offset': offset,
+                                'price': es_price - offset, 'signal': signal, 'reason': reason, 'ladder': ladder})
+    return records
+
+def write_records(records, out, fmt):
+    if fmt == 'json':
+        json.dump(records, out, indent=2, default=str)
+        return
+    writer = csv.DictWriter(out, fieldnames=SIGNAL_FIELDS + LINE_FIELDS)
+    writer.writeheader()
+    for rec in records:
+        for line in rec['ladder']: writer.writerow({**{k: rec[k] for k in SIGNAL_FIELDS}, **line})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute ladders and NY signals in batch, without the Streamlit UI.")
+    parser.add_argument('--symbols', nargs='+', default=["ES=F"])
+    parser.add_argument('--dates', nargs='*', default=None, help="Anchor session dates (YYYY-MM-DD); default: every stored session")
+    parser.add_argument('--hours', nargs='+', type=int, default=[9], help="Target hours CT on the next trading day")
+    parser.add_argument('--offsets', nargs='+', type=float, default=[0.0], help="ES-SPX offsets in points")
+    parser.add_argument('--price-at', choices=['live', 'target'], default='live', help="Signal against the latest close or the target bar's open")
+    parser.add_argument('--files', default=None, help="Read <dir>/<symbol>.csv instead of the market-data store")
+    parser.add_argument('--sync', action='store_true', help="Sync the store from yfinance before computing")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--out', default=None, help="Output path; default stdout")
+    args = parser.parse_args(argv)
+
+    dates = [pd.Timestamp(d).date() for d in args.dates] if args.dates else None
+    records = []
+    for symbol in args.symbols:
+        df = load_symbol(symbol, args.files, args.sync)
+        if df is None or df.empty:
+            print(f"No data for {symbol}", file=sys.stderr)
+            continue
+        records += compute_signals(df, symbol, dates, args.hours, args.offsets, args.price_at)
+
+    if args.out:
+        with open(args.out, 'w', newline='') as f: write_records(records, f, args.format)
+    else: write_records(records, sys.stdout, args.format)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+# Headless compute core: time/ladder math, Black-Scholes, the market-data store and the signal logic.
+# Imports without Streamlit; yfinance and scipy are only loaded when a function needs them.
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta, date
+import pytz
+import itertools
+import math
+import os
+import json
+import time
+try: import fcntl
+except ImportError: fcntl = None # Windows: single-process store access only
+from metrics import count, span, timed
+
+# --- 1. SYSTEM CONSTANTS ---
+RATE_PER_CANDLE = 0.52
+CANDLE_MINUTES = 30
+CT_TZ = pytz.timezone('US/Central')
+MAINTENANCE_START_HOUR = 16 
+MAINTENANCE_END_HOUR = 17 
+NY_SESSION_START, NY_SESSION_END = '08:30', '15:00'
+STORE_DIR = os.environ.get('MARKET_STORE_DIR', '.market_store')
+STORE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+STORE_MIN_SYNC_SECONDS = 60 # Other processes/users reuse a sync this recent instead of calling the fetcher again
+YF_INTRADAY_LOOKBACK_DAYS = 59 # yfinance only serves 30m bars for the last 60 days
+
+# --- 2. CORE MATHEMATICS & TIME HANDLING ---
+def is_trading_slot(wd: int, hr: int) -> bool:
+    is_maint = (hr >= MAINTENANCE_START_HOUR and hr < MAINTENANCE_END_HOUR)
+    is_sat = (wd == 5)
+    is_sun_pre = (wd == 6 and hr < MAINTENANCE_END_HOUR)
+    is_fri_post = (wd == 4 and hr >= MAINTENANCE_START_HOUR)
+    return not (is_maint or is_sat or is_sun_pre or is_fri_post)
+
+# Trading-slot calendar: the session rules only depend on (weekday, hour) of the wall clock, so one week of
+# 30m slots is a complete period. SLOT_PREFIX[j] = tradable slots in [0, j) from Monday 00:00, which turns any
+# count into (full weeks * WEEK_SLOTS_TRADABLE) + a prefix lookup. Hour boundaries are multiples of a slot, so a
+# walk that starts off the :00/:30 grid classifies exactly like the grid slot it falls in.
+SLOT_DELTA = timedelta(minutes=CANDLE_MINUTES)
+SLOTS_PER_WEEK = 7 * 24 * 60 // CANDLE_MINUTES
+SLOT_EPOCH = datetime(2000, 1, 3) # A Monday 00:00, wall clock
+TRADING_SLOT_MASK = np.array([is_trading_slot(j * CANDLE_MINUTES // 1440, (j * CANDLE_MINUTES // 60) % 24) for j in range(SLOTS_PER_WEEK)], dtype=np.int64)
+SLOT_PREFIX = np.concatenate(([0], np.cumsum(TRADING_SLOT_MASK)))
+WEEK_SLOTS_TRADABLE = int(SLOT_PREFIX[-1])
+
+def _tradable_slots_before(slot_idx, slots_per_week=SLOTS_PER_WEEK, prefix=SLOT_PREFIX):
+    weeks, rem = np.divmod(slot_idx, slots_per_week)
+    return weeks * prefix[-1] + prefix[rem]
+
+_SLOT_CALENDARS = {CANDLE_MINUTES: (SLOTS_PER_WEEK, SLOT_PREFIX)}
+
+def slot_calendar(candle_minutes: int):
+    """(slots per week, tradable prefix) for another candle size; it must divide an hour for the prefix trick to hold."""
+    if candle_minutes not in _SLOT_CALENDARS:
+        if 60 % candle_minutes: raise ValueError(f"candle_minutes must divide 60, got {candle_minutes}")
+        slots = 7 * 24 * 60 // candle_minutes
+        mask = [is_trading_slot(j * candle_minutes // 1440, (j * candle_minutes // 60) % 24) for j in range(slots)]
+        _SLOT_CALENDARS[candle_minutes] = (slots, np.concatenate(([0], np.cumsum(mask, dtype=np.int64))))
+    return _SLOT_CALENDARS[candle_minutes]
+
+def _wall_span(start_dt: datetime, end_dt: datetime):
+    # Mirrors how the 30m walk advanced: a pd.Timestamp steps in absolute time and re-reads its local wall clock,
+    # a plain aware datetime steps on its own (fixed) wall clock and is compared to end_dt in absolute time
+    # unless both share the same tzinfo. US/Central DST flips at 02:00 Sunday, inside the weekend close, so
+    # counting on the wall clock never gains or loses a tradable slot.
+    if isinstance(start_dt, pd.Timestamp):
+        return start_dt.replace(tzinfo=None), pd.Timestamp(end_dt).tz_convert(start_dt.tz).replace(tzinfo=None)
+    w0 = start_dt.replace(tzinfo=None)
+    if not isinstance(end_dt, pd.Timestamp) and end_dt.tzinfo is start_dt.tzinfo: return w0, end_dt.replace(tzinfo=None)
+    return w0, w0 + (end_dt - start_dt)
+
+def count_candles_between(start_dt: datetime, end_dt: datetime) -> int:
+    if start_dt.tzinfo is None: start_dt = CT_TZ.localize(start_dt)
+    if end_dt.tzinfo is None: end_dt = CT_TZ.localize(end_dt)
+    if start_dt >= end_dt: return 0
+    w0, w1 = _wall_span(start_dt, end_dt)
+    steps = -((w0 - w1) // SLOT_DELTA) # ceil: number of 30m steps taken while current_time < end_dt
+    if steps <= 0: return 0
+    j0 = (w0 - SLOT_EPOCH) // SLOT_DELTA
+    return int(_tradable_slots_before(j0 + steps) - _tradable_slots_before(j0))
+
+def _to_ct_index(values) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(np.atleast_1d(values) if np.ndim(values) == 0 else values)
+    # A skipped spring-forward wall time lands where CT_TZ.localize puts it (read as CST), like the scalar path
+    return idx.tz_localize(CT_TZ, ambiguous=False, nonexistent=pd.Timedelta(hours=1)) if idx.tz is None else idx
+
+def _plain_datetime_starts(starts):
+    # (mask, wall ns, absolute ns) for the starts that are plain datetimes rather than pd.Timestamps; those step on
+    # their own fixed UTC offset in count_candles_between. Datetime64 containers only ever hold Timestamps.
+    if isinstance(starts, (pd.Timestamp, pd.Index, pd.Series, np.datetime64)) or (isinstance(starts, np.ndarray) and starts.dtype != object):
+        return None
+    values = [starts] if isinstance(starts, datetime) else list(starts)
+    plain = np.array([isinstance(v, datetime) and not isinstance(v, pd.Timestamp) for v in values])
+    if not plain.any(): return None
+    local = [v if v.tzinfo is not None else CT_TZ.localize(v) for v, p in zip(values, plain) if p]
+    wall = np.array([(v.replace(tzinfo=None) - datetime(1970, 1, 1)) // timedelta(microseconds=1) * 1000 for v in local], dtype=np.int64)
+    offset = np.array([v.utcoffset() // timedelta(microseconds=1) * 1000 for v in local], dtype=np.int64)
+    return plain, wall, wall - offset
+
+@timed('count_candles_between_batch')
+def count_candles_between_batch(starts, ends, candle_minutes=CANDLE_MINUTES) -> np.ndarray:
+    """Vectorized count_candles_between for arrays of timestamps (scalars broadcast). Naive values are CT.
+    As in the scalar walk, pd.Timestamp starts count on their zone's wall clock and plain datetime starts on
+    their fixed UTC offset, so the two agree across DST changes."""
+    s_idx = _to_ct_index(starts).as_unit('ns')
+    e_idx = _to_ct_index(ends).tz_convert(s_idx.tz).as_unit('ns')
+    calendar = slot_calendar(candle_minutes)
+    slot_ns, epoch_ns = candle_minutes * 60 * 10**9, pd.Timestamp(SLOT_EPOCH).as_unit('ns').value
+    s_wall, s_abs, plain = s_idx.tz_localize(None).asi8, s_idx.asi8, np.zeros(len(s_idx), dtype=bool)
+    fixed = _plain_datetime_starts(starts)
+    if fixed is not None:
+        plain, wall, absolute = fixed
+        s_wall, s_abs = s_wall.copy(), s_abs.copy()
+        s_wall[plain], s_abs[plain] = wall, absolute
+    w0, w1, u0, u1, plain = np.broadcast_arrays(s_wall, e_idx.tz_localize(None).asi8, s_abs, e_idx.asi8, plain)
+    w1 = np.where(plain, w0 + (u1 - u0), w1)
+    steps = np.maximum(-((w0 - w1) // slot_ns), 0)
+    j0 = (w0 - epoch_ns) // slot_ns
+    return np.where(u0 < u1, _tradable_slots_before(j0 + steps, *calendar) - _tradable_slots_before(j0, *calendar), 0).astype(np.int64)
+
+def project_line_value(anchor_price: float, anchor_time: datetime, target_time: datetime, is_ascending: bool) -> float:
+    move = RATE_PER_CANDLE * count_candles_between(anchor_time, target_time)
+    return anchor_price + move if is_ascending else anchor_price - move
+
+def get_target_time(target_date: date, hour: int) -> datetime:
+    next_day = target_date + timedelta(days=1)
+    while next_day.weekday() > 4: next_day += timedelta(days=1)
+    dt = datetime.combine(next_day, datetime.min.time()) + timedelta(hours=hour)
+    return CT_TZ.localize(dt)
+
+# Black-Scholes Model
+def bs_premium(S, K, T, r, sigma, option_type):
+    from scipy.stats import norm
+    if T <= 0: return max(0.0, S - K) if option_type == 'C' else max(0.0, K - S)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
+    d2 = d1 - sigma * math.sqrt(T)
+    if option_type == 'C': return S * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
+    else: return K * math.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+
+BS_GRID_MAX_CELLS = 250_000 # Cells priced per chunk; bounds the temporaries of bs_chain_grid to a few MB
+TRADING_MINUTES_PER_YEAR = 252 * 390 # VIX is quoted on cash-session time
+ENTRY_HOURS_LEFT = 6.0 # Cash-session hours left when the NY signal is traded at 9 AM CT
+ENTRY_T = ENTRY_HOURS_LEFT * 60 / TRADING_MINUTES_PER_YEAR # The same, in years of cash-session time
+
+def bs_chain(S, K, T, r, sigma, option_type='C'):
+    """Array version of bs_premium: every argument broadcasts (option_type as 'C'/'P' or an array of them).
+    Returns premium plus delta, gamma, theta and vega; theta and vega are per unit of T and sigma."""
+    from scipy.stats import norm
+    S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, r, sigma)))
+    is_call = np.broadcast_to(np.asarray(option_type) == 'C', S.shape)
+    live = T > 0
+    sqrt_t = np.sqrt(np.where(live, T, 1.0))
+    vol_t = np.where(live, sigma, 1.0) * sqrt_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * np.where(live, T, 0.0)) / vol_t
+    d2 = d1 - vol_t
+    disc = np.exp(-r * np.where(live, T, 0.0))
+    pdf_d1 = norm.pdf(d1)
+    call = S * norm.cdf(d1) - K * disc * norm.cdf(d2)
+    put = K * disc * norm.cdf(-d2) - S * norm.cdf(-d1)
+    premium = np.where(live, np.where(is_call, call, put), np.where(is_call, np.maximum(0.0, S - K), np.maximum(0.0, K - S)))
+    delta = np.where(is_call, norm.cdf(d1), norm.cdf(d1) - 1.0)
+    expired_delta = np.where(is_call, (S > K).astype(float), -(K > S).astype(float))
+    theta = -S * pdf_d1 * sigma / (2 * sqrt_t) + np.where(is_call, -r * K * disc * norm.cdf(d2), r * K * disc * norm.cdf(-d2))
+    return {
+        'premium': premium,
+        'delta': np.where(live, delta, expired_delta),
+        'gamma': np.where(live, pdf_d1 / (S * vol_t), 0.0),
+        'theta': np.where(live, theta, 0.0),
+        'vega': np.where(live, S * pdf_d1 * sqrt_t, 0.0),
+    }
+
+def bs_chain_grid(S, strikes, times, vols, r, option_type='C', max_cells=BS_GRID_MAX_CELLS):
+    """Prices the strike x time-to-expiry x vol grid with bs_chain, chunked along strikes (and along times and
+    vols once a single strike row is over budget) so at most max_cells cells are in flight at once.
+    Each output array has shape (len(strikes), len(times), len(vols))."""
+    strikes, times, vols = (np.atleast_1d(np.asarray(a, dtype=float)) for a in (strikes, times, vols))
+    shape = (len(strikes), len(times), len(vols))
+    out = {k: np.empty(shape) for k in ('premium', 'delta', 'gamma', 'theta', 'vega')}
+    v_step = max(1, min(shape[2], max_cells))
+    t_step = max(1, min(shape[1], max_cells // v_step))
+    k_step = max(1, max_cells // (t_step * v_step))
+    for k_lo, t_lo, v_lo in itertools.product(range(0, shape[0], k_step), range(0, shape[1], t_step), range(0, shape[2], v_step)):
+        block = np.s_[k_lo:k_lo + k_step, t_lo:t_lo + t_step, v_lo:v_lo + v_step]
+        chunk = bs_chain(S, strikes[block[0], None, None], times[None, block[1], None], r, vols[None, None, block[2]], option_type)
+        for k, v in chunk.items(): out[k][block] = v
+    return out
+
+def bs_implied_vol(price, S, K, T, r, option_type='C', tol=1e-8, max_iter=100, lo=1e-6, hi=5.0, min_gap=1e-8):
+    """Batch implied vol: Newton steps safeguarded by a shrinking [lo, hi] bracket, converged once the Newton step
+    is under tol (in vol). NaN where the price falls outside the no-arbitrage range or within min_gap of either end
+    of it (deep ITM/OTM short-dated strikes, whose price no longer depends on vol), the option has expired, or the
+    solve did not converge."""
+    price, S, K, T, r = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, S, K, T, r)))
+    opt = np.broadcast_to(np.asarray(option_type), price.shape)
+    lo, hi = np.full(price.shape, lo), np.full(price.shape, hi)
+    valid = (T > 0) & (price - bs_chain(S, K, T, r, lo, opt)['premium'] > min_gap) & (bs_chain(S, K, T, r, hi, opt)['premium'] - price > min_gap)
+    sigma = np.full(price.shape, 0.2)
+    for _ in range(max_iter):
+        res = bs_chain(S, K, T, r, sigma, opt)
+        diff = res['premium'] - price
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = diff / res['vega']
+        done = np.abs(step) < tol # Vega-relative: a flat premium never counts as a match
+        if np.all(~valid | done): break
+        lo, hi = np.where(diff < 0, sigma, lo), np.where(diff > 0, sigma, hi)
+        newton = sigma - step
+        sigma = np.where(done, sigma, np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi)))
+    return np.where(valid & done, sigma, np.nan)
+
+# Line-touch odds: price as driftless Brownian motion in points, each ladder line drifting RATE_PER_CANDLE per candle.
+# The gap to a linearly moving line is Brownian motion with drift, so touch odds have a closed form.
+MC_PATHS = 1_000_000
+MC_MAX_BYTES = 48 * 2**20 # Per-chunk budget for simulated paths and their temporaries
+MC_BYTES_PER_PAIR = 4 * 7 + 1 # float32 level, shock, scratch, a running max/min for each of the two line slopes, and a bool mask
+MC_TAIL_BYTES_PER_PAIR = 4 + 8 # With tail_df: the float32 per-path vol scale and the float64 chi-square draw it is built from
+BGK_SHIFT = 0.5826 # Broadie-Glasserman-Kou: moving the line this many sigma*sqrt(dt) closer turns candle-close touches into intrabar ones
+
+def candle_sigma(price, vol):
+    """Points of one-sigma move per candle for an annualized vol (VIX / 100)."""
+    return price * vol * math.sqrt(CANDLE_MINUTES / TRADING_MINUTES_PER_YEAR)
+
+def _line_gaps(ladder, price, rate):
+    gaps = np.array([l['val'] for l in ladder], dtype=float) - price
+    slopes = np.where(np.array([l['dir'] for l in ladder]) == 'Ascending', rate, -rate)
+    return gaps, slopes
+
+def touch_probabilities(gaps, slopes, sigma, steps):
+    """Closed-form odds per line of touching it (continuously) within `steps` candles and of finishing beyond it.
+    gaps are line minus price in points, slopes the line's drift in points per candle, sigma per candle."""
+    from scipy.special import log_ndtr, ndtr
+    gaps, slopes = np.broadcast_arrays(np.asarray(gaps, dtype=float), np.asarray(slopes, dtype=float))
+    a, mu = np.abs(gaps), np.where(gaps > 0, -slopes, slopes) # Distance and closing drift; a line at the price counts as below
+    sd = sigma * math.sqrt(steps)
+    close = ndtr((mu * steps - a) / sd)
+    touch = close + np.exp(np.minimum(2 * mu * a / sigma ** 2 + log_ndtr((-a - mu * steps) / sd), 0.0))
+    return np.minimum(touch, 1.0), close
+
+def simulate_touches(gaps, slopes, sigma, steps, n_paths=MC_PATHS, tail_df=None, seed=None, max_bytes=MC_MAX_BYTES, workers=None):
+    """Monte Carlo version of touch_probabilities. Paths advance one candle at a time and only keep their running
+    extremes against each line slope, so a chunk costs MC_BYTES_PER_PAIR per antithetic pair whatever `steps` is.
+    Chunks of at most max_bytes run on a thread pool. Touches are checked at candle closes against lines moved
+    BGK_SHIFT sigma closer, approximating intrabar touches. tail_df draws one vol multiplier per path so the
+    session's move is Student-t with that many degrees of freedom and the same variance."""
+    from concurrent.futures import ThreadPoolExecutor
+    if tail_df is not None and tail_df <= 2: raise ValueError(f"tail_df must be above 2 for a finite variance, got {tail_df}")
+    gaps, slopes = np.asarray(gaps, dtype=float), np.asarray(slopes, dtype=float)
+    workers = workers or os.cpu_count() or 1
+    pairs = (n_paths + 1) // 2 # Every draw is also used negated
+    per_pair = MC_BYTES_PER_PAIR + (MC_TAIL_BYTES_PER_PAIR if tail_df else 0)
+    chunk = max(1, min(max_bytes // per_pair, -(-pairs // workers)))
+    sizes = [min(chunk, pairs - lo) for lo in range(0, pairs, chunk)]
+    slope_set = np.unique(np.concatenate([slopes, -slopes])) # A negated path meets slope s where the original meets -s
+    shift = BGK_SHIFT * sigma
+
+    def run(size, seq):
+        rng = np.random.default_rng(seq)
+        scale = np.float32(sigma)
+        if tail_df: # Built in place, so the chi-square draw is the only float64 array
+            draw = rng.chisquare(tail_df, size)
+            np.sqrt(np.divide(tail_df - 2, draw, out=draw), out=draw)
+            draw *= sigma
+            scale = draw.astype(np.float32)
+        level, shock, rel = (np.zeros(size, dtype=np.float32) for _ in range(3))
+        hi, lo = ({s: np.zeros(size, dtype=np.float32) for s in slope_set} for _ in range(2))
+        for k in range(1, steps + 1):
+            rng.standard_normal(size, dtype=np.float32, out=shock)
+            shock *= scale
+            level += shock
+            for s in slope_set: # Running max/min of price minus the line's drift so far
+                np.subtract(level, np.float32(s * k), out=rel)
+                np.maximum(hi[s], rel, out=hi[s])
+                np.minimum(lo[s], rel, out=lo[s])
+        touched, beyond = np.zeros(len(gaps), dtype=np.int64), np.zeros(len(gaps), dtype=np.int64)
+        for i, (g, s) in enumerate(zip(gaps, slopes)):
+            drift = s * steps
+            if g > 0:
+                touched[i] = np.count_nonzero(hi[s] >= g - shift) + np.count_nonzero(lo[-s] <= shift - g)
+                beyond[i] = np.count_nonzero(level >= g + drift) + np.count_nonzero(level <= -g - drift)
+            else:
+                touched[i] = np.count_nonzero(lo[s] <= g + shift) + np.count_nonzero(hi[-s] >= -g - shift)
+                beyond[i] = np.count_nonzero(level <= g + drift) + np.count_nonzero(level >= -g - drift)
+        return touched, beyond
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(run, sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+    touched, beyond = (sum(p[k] for p in parts) for k in (0, 1))
+    return touched / (2 * pairs), beyond / (2 * pairs)
+
+def line_touch_probabilities(ladder, price, vol, steps, rate=RATE_PER_CANDLE, n_paths=None, tail_df=None, seed=None, workers=None, elapsed=0):
+    """Adds 'touch' and 'close_beyond' odds to each ladder line over the next `steps` candles. Lines are first
+    moved `elapsed` candles past the ladder's target time ('val' is returned there). Normal moves use the closed
+    form unless n_paths asks for a simulation; fat tails (tail_df) always simulate."""
+    if not ladder: return []
+    gaps, slopes = _line_gaps(ladder, price, rate)
+    gaps = gaps + slopes * elapsed
+    sigma = candle_sigma(price, vol)
+    if tail_df or n_paths: touch, close = simulate_touches(gaps, slopes, sigma, steps, n_paths or MC_PATHS, tail_df, seed, workers=workers)
+    else: touch, close = touch_probabilities(gaps, slopes, sigma, steps)
+    return [{**l, 'val': l['val'] + float(s) * elapsed, 'touch': float(t), 'close_beyond': float(c)} for l, s, t, c in zip(ladder, slopes, touch, close)]
+
+# --- 3. DATA ENGINE & AUTO-DETECTION ---
+# Fetchers: fetcher(symbol, start) -> OHLCV frame with a tz-aware (or UTC-naive) index, bars at or after start
+def yfinance_fetcher(symbol, start=None):
+    floor = pd.Timestamp.now(tz='UTC') - timedelta(days=YF_INTRADAY_LOOKBACK_DAYS)
+    import yfinance as yf
+    return yf.Ticker(symbol).history(start=max(start, floor) if start is not None else floor, interval="30m")
+
+def make_file_fetcher(directory):
+    """Local stand-in for yfinance_fetcher: serves <directory>/<symbol>.csv (datetime index + OHLCV columns)."""
+    def fetch(symbol, start=None):
+        df = pd.read_csv(os.path.join(directory, f"{symbol}.csv"), index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+        return df if start is None else df[df.index >= start]
+    return fetch
+
+# Local store: one append-only float64/int64 file per column under STORE_DIR/<symbol>/, plus meta.json holding
+# the committed row count. Files never shrink (a refreshed tail is overwritten in place), so readers can mmap
+# them safely while another process syncs; rows past meta['rows'] are ignored.
+def _store_path(symbol, root=STORE_DIR):
+    return os.path.join(root, ''.join(c if c.isalnum() else '_' for c in symbol))
+
+def _store_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f: return json.load(f)
+    except FileNotFoundError: return {'rows': 0, 'synced_at': 0.0}
+
+def _write_store_meta(path, meta):
+    tmp = os.path.join(path, f'meta.json.{os.getpid()}')
+    with open(tmp, 'w') as f: json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+def store_columns(symbol, root=STORE_DIR):
+    """Zero-copy read-only memmaps of every stored column ('ts' is UTC epoch nanoseconds)."""
+    path = _store_path(symbol, root)
+    rows = _store_meta(path)['rows']
+    cols = {}
+    for col, dtype in [('ts', np.int64)] + [(c, np.float64) for c in STORE_COLUMNS]:
+        cols[col] = np.memmap(os.path.join(path, f'{col}.bin'), dtype=dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+    return cols
+
+@timed('store_read')
+def store_read(symbol, start=None, end=None, root=STORE_DIR):
+    cols = store_columns(symbol, root)
+    bound = lambda t: pd.Timestamp(t).tz_localize(CT_TZ) if pd.Timestamp(t).tzinfo is None else pd.Timestamp(t)
+    i0 = np.searchsorted(cols['ts'], bound(start).as_unit('ns').value) if start is not None else 0
+    i1 = np.searchsorted(cols['ts'], bound(end).as_unit('ns').value, side='right') if end is not None else len(cols['ts'])
+    index = pd.DatetimeIndex(np.asarray(cols['ts'][i0:i1]).view('M8[ns]')).tz_localize('UTC').tz_convert(CT_TZ)
+    return pd.DataFrame({c: np.asarray(cols[c][i0:i1]) for c in STORE_COLUMNS}, index=index)
+
+@timed('store_sync')
+def store_sync(symbol, fetcher=yfinance_fetcher, root=STORE_DIR, force=False):
+    """Fetches only the bars since the last stored one (re-fetching that last, possibly unfinished, bar)
+    and commits them. Returns the committed row count."""
+    path = _store_path(symbol, root)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, '.lock'), 'w') as lock:
+        if fcntl: fcntl.flock(lock, fcntl.LOCK_EX)
+        meta = _store_meta(path)
+        if not force and time.time() - meta['synced_at'] < STORE_MIN_SYNC_SECONDS: return meta['rows']
+        ts = store_columns(symbol, root)['ts']
+        with span('fetch'): new = fetcher(symbol, pd.Timestamp(int(ts[-1]), tz='UTC') if len(ts) else None)
+        count('store_sync.fetch')
+        if new is not None and len(new):
+            new = new.tz_localize('UTC') if new.index.tz is None else new.tz_convert('UTC')
+            new = new[~new.index.duplicated(keep='last')].sort_index()
+            new_ts = new.index.as_unit('ns').asi8
+            keep = int(np.searchsorted(ts, new_ts[0])) # Stored bars from here on are replaced by the fetch
+            for col in ['ts'] + STORE_COLUMNS:
+                values = new_ts if col == 'ts' else np.asarray(new[col] if col in new else np.zeros(len(new)), dtype=np.float64)
+                mode = 'r+b' if os.path.exists(os.path.join(path, f'{col}.bin')) else 'wb'
+                with open(os.path.join(path, f'{col}.bin'), mode) as f:
+                    f.seek(keep * 8)
+                    f.write(values.tobytes())
+            meta['rows'] = keep + len(new)
+        meta['synced_at'] = time.time()
+        _write_store_meta(path, meta)
+        return meta['rows']
+
+def load_market_data(symbol="ES=F", days=10):
+    try: store_sync(symbol)
+    except Exception: pass # Serve whatever the store already holds
+    try:
+        data = store_read(symbol, start=pd.Timestamp.now(tz=CT_TZ).normalize() - timedelta(days=days))
+        return data if len(data) else None
+    except Exception: return None
+
+def filter_ny_session(df, target_date):
+    target_date_str = target_date.strftime('%Y-%m-%d')
+    try:
+        return df.loc[target_date_str].between_time(NY_SESSION_START, NY_SESSION_END)
+    except KeyError:
+        return pd.DataFrame()
+
+def _extrema_masks(closes, first):
+    # Shifted-array version of the bounce/rejection rules; `first` marks each session's opening bar, so the
+    # session edges only compare against their single in-session neighbour.
+    last = np.roll(first, -1)
+    last[-1] = True
+    prev, nxt = np.roll(closes, 1), np.roll(closes, -1)
+    bounces = (first | (closes < prev)) & (last | (closes < nxt))
+    rejections = (first | (closes > prev)) & (last | (closes > nxt))
+    return bounces, rejections
+
+@timed('detect_inflection_points')
+def detect_inflection_points(ny_data):
+    if ny_data.empty or len(ny_data) < 2: return None
+    closes, times = np.asarray(ny_data['Close']), ny_data.index
+    first = np.zeros(len(closes), dtype=bool)
+    first[0] = True
+    is_bounce, is_rejection = _extrema_masks(closes, first)
+    bounces = [{'time': times[i], 'price': closes[i]} for i in np.flatnonzero(is_bounce)]
+    rejections = [{'time': times[i], 'price': closes[i]} for i in np.flatnonzero(is_rejection)]
+    bearish, bullish = ny_data[ny_data['Close'] < ny_data['Open']], ny_data[ny_data['Close'] > ny_data['Open']]
+    hw = {'time': bearish['High'].idxmax(), 'price': bearish.loc[bearish['High'].idxmax(), 'High']} if not bearish.empty else None
+    lw = {'time': bullish['Low'].idxmin(), 'price': bullish.loc[bullish['Low'].idxmin(), 'Low']} if not bullish.empty else None
+    return {'bounces': bounces, 'rejections': rejections, 'hw': hw, 'lw': lw}
+
+INFLECTION_COLUMNS = ['date', 'kind', 'time', 'price']
+
+@timed('detect_inflection_points_batch')
+def detect_inflection_points_batch(df, start=NY_SESSION_START, end=NY_SESSION_END) -> pd.DataFrame:
+    """detect_inflection_points for every NY session of a multi-day 30m frame in one grouped pass.
+    Returns one row per inflection with kind in HW/B/LW/R, ordered by date, kind and bar. attrs['sessions'] lists
+    every session detect_inflection_points would not return None for, including any without a single inflection."""
+    ny = df.iloc[df.index.indexer_between_time(start, end)]
+    ny = ny.iloc[np.argsort(ny.index.date, kind='stable')]
+    days = pd.Index(ny.index.date)
+    sizes = days.value_counts()
+    keep = days.isin(sizes.index[sizes >= 2])
+    ny, days = ny[keep], days[keep]
+    sessions = np.array(sorted(sizes.index[sizes >= 2]), dtype='datetime64[D]') # datetime64 so attrs copies stay cheap
+    if ny.empty:
+        out = pd.DataFrame(columns=INFLECTION_COLUMNS)
+        out.attrs['sessions'] = sessions
+        return out
+
+    closes, times = np.asarray(ny['Close']), ny.index
+    first = np.ones(len(ny), dtype=bool)
+    first[1:] = days[1:] != days[:-1]
+    is_bounce, is_rejection = _extrema_masks(closes, first)
+    parts = [pd.DataFrame({'date': days[m], 'kind': kind, 'time': times[m], 'price': closes[m]}) for kind, m in (('B', is_bounce), ('R', is_rejection))]
+    for kind, col, mask, fn in (('HW', 'High', ny['Close'] < ny['Open'], 'idxmax'), ('LW', 'Low', ny['Close'] > ny['Open'], 'idxmin')):
+        wicks = ny.loc[mask, col].reset_index(drop=True)
+        if wicks.empty: continue
+        rows = getattr(wicks.groupby(days[np.asarray(mask)]), fn)()
+        parts.append(pd.DataFrame({'date': rows.index, 'kind': kind, 'time': times[np.asarray(mask)][rows.values], 'price': wicks.values[rows.values]}))
+    out = pd.concat(parts, ignore_index=True)
+    out['kind'] = pd.Categorical(out['kind'], categories=['HW', 'B', 'LW', 'R'])
+    out = out.sort_values(['date', 'kind'], kind='stable', ignore_index=True)
+    out.attrs['sessions'] = sessions
+    return out
+
+def inflections_for_date(batch: pd.DataFrame, target_date: date):
+    """Rebuilds detect_inflection_points' dict for one session of a detect_inflection_points_batch result."""
+    rows = batch[batch['date'] == target_date]
+    if rows.empty:
+        # A flat session (equal closes, no bearish or bullish bar) has no rows but still gets an empty dict
+        is_session = np.datetime64(target_date, 'D') in batch.attrs.get('sessions', ())
+        return {'bounces': [], 'rejections': [], 'hw': None, 'lw': None} if is_session else None
+    pick = lambda kind: [{'time': t, 'price': p} for t, p in zip(rows.loc[rows['kind'] == kind, 'time'], rows.loc[rows['kind'] == kind, 'price'])]
+    hw, lw = pick('HW'), pick('LW')
+    return {'bounces': pick('B'), 'rejections': pick('R'), 'hw': hw[0] if hw else None, 'lw': lw[0] if lw else None}
+
+@timed('calculate_ladder')
+def calculate_ladder(inflections, target_time, offset=0.0):
+    lines = []
+    if inflections['hw']: lines.append({'label': 'HW', 'name': 'Highest Wick', 'dir': 'Ascending', 'val': project_line_value(inflections['hw']['price'], inflections['hw']['time'], target_time, True) - offset, 'is_key': True})
+    hb_val, hb_ref = -float('inf'), None
+    for i, b in enumerate(inflections['bounces']):
+        val = project_line_value(b['price'], b['time'], target_time, True) - offset
+        line = {'label': f'B{i+1}', 'name': 'Bounce', 'dir': 'Ascending', 'val': val, 'is_key': False}
+        lines.append(line)
+        if val > hb_val: hb_val, hb_ref = val, line
+    if hb_ref: hb_ref.update({'is_key': True, 'label': 'HB', 'name': 'Highest Bounce'})
+
+    if inflections['lw']: lines.append({'label': 'LW', 'name': 'Lowest Wick', 'dir': 'Descending', 'val': project_line_value(inflections['lw']['price'], inflections['lw']['time'], target_time, False) - offset, 'is_key': True})
+    lr_val, lr_ref = float('inf'), None
+    for i, r in enumerate(inflections['rejections']):
+        val = project_line_value(r['price'], r['time'], target_time, False) - offset
+        line = {'label': f'R{i+1}', 'name': 'Rejection', 'dir': 'Descending', 'val': val, 'is_key': False}
+        lines.append(line)
+        if val < lr_val: lr_val, lr_ref = val, line
+    if lr_ref: lr_ref.update({'is_key': True, 'label': 'LR', 'name': 'Lowest Rejection'})
+    lines.sort(key=lambda x: x['val'], reverse=True)
+    return lines
+
+LADDER_GRID_COLUMNS = ['target_time', 'offset', 'label', 'name', 'dir', 'val', 'is_key']
+
+def get_session_target_times(target_date: date, start: str = NY_SESSION_START, end: str = NY_SESSION_END) -> pd.DatetimeIndex:
+    """Every 30m slot of the session following target_date, for drawing the full cone."""
+    slots = pd.date_range(get_target_time(target_date, 0), periods=SLOTS_PER_WEEK // 7, freq=f'{CANDLE_MINUTES}min')
+    return slots[slots.indexer_between_time(start, end)]
+
+@timed('calculate_ladder_grid')
+def calculate_ladder_grid(inflections, target_times, offsets=(0.0,)) -> pd.DataFrame:
+    """Columnar calculate_ladder: projects every anchor onto every target time x offset in one NumPy pass.
+    Returns one row per (target_time, offset, line); each group holds exactly what calculate_ladder returns, in the same order."""
+    hw, lw = inflections['hw'], inflections['lw']
+    anchors = ([('HW', 'Highest Wick', True, 0, hw)] if hw else []) + [(f'B{i+1}', 'Bounce', True, 1, b) for i, b in enumerate(inflections['bounces'])]
+    anchors += ([('LW', 'Lowest Wick', False, 0, lw)] if lw else []) + [(f'R{i+1}', 'Rejection', False, 2, r) for i, r in enumerate(inflections['rejections'])]
+    targets, offsets = _to_ct_index(target_times), np.atleast_1d(np.asarray(offsets, dtype=float))
+    if not anchors or len(targets) == 0 or len(offsets) == 0: return pd.DataFrame(columns=LADDER_GRID_COLUMNS)
+    labels, names, is_asc, kind, points = map(np.array, zip(*anchors))
+    n_a, n_t, n_o = len(anchors), len(targets), len(offsets)
+
+    # (anchor, target) candle counts in one calendar lookup, then (anchor, target, offset) values
+    anchor_times = _to_ct_index([p['time'] for p in points])
+    counts = count_candles_between_batch(anchor_times.repeat(n_t), np.tile(targets, n_a)).reshape(n_a, n_t)
+    prices = np.array([p['price'] for p in points], dtype=float)
+    moves = np.where(is_asc, RATE_PER_CANDLE, -RATE_PER_CANDLE)[:, None] * counts
+    vals = (prices[:, None] + moves)[:, :, None] - offsets[None, None, :]
+
+    # Key flags: wicks are always key, the first highest bounce / lowest rejection per (target, offset) becomes HB / LR
+    is_key = np.broadcast_to((kind == 0)[:, None, None], vals.shape).copy()
+    labels = np.broadcast_to(labels[:, None, None], vals.shape).astype(object)
+    names = np.broadcast_to(names[:, None, None], vals.shape).astype(object)
+    grid_t, grid_o = np.meshgrid(np.arange(n_t), np.arange(n_o), indexing='ij')
+    for k, fn, label, name in ((1, np.argmax, 'HB', 'Highest Bounce'), (2, np.argmin, 'LR', 'Lowest Rejection')):
+        rows = np.flatnonzero(kind == k)
+        if len(rows) == 0: continue
+        key_rows = rows[fn(vals[rows], axis=0)]
+        is_key[key_rows, grid_t, grid_o], labels[key_rows, grid_t, grid_o], names[key_rows, grid_t, grid_o] = True, label, name
+
+    # Flatten to (target, offset, line) with each group sorted by val descending, ties kept in insertion order
+    vals, is_key, labels, names = (a.transpose(1, 2, 0).ravel() for a in (vals, is_key, labels, names))
+    group, pos = np.repeat(np.arange(n_t * n_o), n_a), np.tile(np.arange(n_a), n_t * n_o)
+    order = np.lexsort((pos, -vals, group))
+    return pd.DataFrame({
+        'target_time': targets.repeat(n_o * n_a)[order], 'offset': np.repeat(np.tile(offsets, n_t), n_a)[order],
+        'label': labels[order], 'name': names[order], 'dir': np.where(np.tile(is_asc, n_t * n_o), 'Ascending', 'Descending')[order],
+        'val': vals[order], 'is_key': is_key[order],
+    })
+
+def ladder_from_grid(grid: pd.DataFrame, target_time: datetime, offset: float = 0.0):
+    """Slices one (target_time, offset) snapshot out of calculate_ladder_grid as calculate_ladder-style dicts."""
+    rows = grid[(grid['target_time'] == pd.Timestamp(target_time)) & (grid['offset'] == offset)]
+    return rows[['label', 'name', 'dir', 'val', 'is_key']].to_dict('records')
+
+# --- 4. LOGIC GENERATORS ---
+@timed('generate_ny_signal')
+def generate_ny_signal(ladder, current_price):
+    asc_lines = [l for l in ladder if l['dir'] == 'Ascending']
+    desc_lines = [l for l in ladder if l['dir'] == 'Descending']
+    
+    above_all_asc = all(current_price > l['val'] for l in asc_lines) if asc_lines else False
+    below_all_asc = all(current_price < l['val'] for l in asc_lines) if asc_lines else False
+    above_all_desc = all(current_price > l['val'] for l in desc_lines) if desc_lines else False
+    below_all_desc = all(current_price < l['val'] for l in desc_lines) if desc_lines else False
+
+    if below_all_asc and below_all_desc: return "PUT", "Price is below all structural lines. Strong Bearish Trend.", "signal-put"
+    if above_all_asc and above_all_desc: return "CALL", "Price broke through all resistance and support. Strong Bullish Trend.", "signal-call"
+    if below_all_asc: return "PUT", "Price is below all ascending resistance. Buyers are trapped above.", "signal-put"
+    if above_all_asc: return "CALL", "Price broke above all ascending resistance. Bullish continuation.", "signal-call"
+    
+    nearest_above = next((l for l in reversed(ladder) if l['val'] > current_price), None)
+    nearest_below = next((l for l in ladder if l['val'] < current_price), None)
+    
+    if nearest_above and nearest_below:
+        if nearest_above['dir'] == 'Ascending' and nearest_below['dir'] == 'Descending': return "WAIT", f"Choppy. Trapped between Resistance ({nearest_above['label']}) and Support ({nearest_below['label']}).", "signal-wait"
+        if nearest_above['dir'] == 'Descending': return "PUT", f"Bearish Lean. Price capped by descending resistance ({nearest_above['label']}).", "signal-put"
+        if nearest_below['dir'] == 'Ascending': return "CALL", f"Bullish Lean. Price propped by ascending support ({nearest_below['label']}).", "signal-call"
+    
+    return "WAIT", "Market context unclear based on current structural positioning.", "signal-wait"
@@ -0,0 +1,115 @@
+# Lightweight pipeline instrumentation: timing spans, counters and rolling latency histograms shared by every
+# session in the process. Disabled (MARKET_METRICS=0) a span is one flag check returning a shared no-op object.
+import bisect
+import functools
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+# --- 1. CONFIG & STATE ---
+METRICS_ENABLED = os.environ.get('MARKET_METRICS', '1') != '0'
+METRICS_FILE = os.environ.get('MARKET_METRICS_FILE') # .prom -> Prometheus text, anything else -> JSON
+ROLLING_WINDOW = 512 # Samples kept per stage for the rolling percentiles
+BUCKETS_S = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_lock = threading.Lock()
+_write_lock = threading.Lock() # Streamlit sessions are threads of one process
+_samples, _buckets, _totals, _counters = {}, {}, {}, {}
+
+def set_enabled(enabled: bool):
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+def reset():
+    with _lock:
+        for d in (_samples, _buckets, _totals, _counters): d.clear()
+
+# --- 2. RECORDING ---
+def observe(stage, seconds):
+    with _lock:
+        if stage not in _samples:
+            _samples[stage], _buckets[stage], _totals[stage] = deque(maxlen=ROLLING_WINDOW), [0] * (len(BUCKETS_S) + 1), [0, 0.0]
+        _samples[stage].append(seconds)
+        _buckets[stage][bisect.bisect_left(BUCKETS_S, seconds)] += 1
+        _totals[stage][0] += 1
+        _totals[stage][1] += seconds
+
+def count(name, n=1):
+    if not METRICS_ENABLED: return
+    with _lock: _counters[name] = _counters.get(name, 0) + n
+
+class _Span:
+    __slots__ = ('stage', 't0')
+    def __init__(self, stage): self.stage = stage
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+    def __exit__(self, *exc): observe(self.stage, perf_counter() - self.t0)
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage):
+    return _Span(stage) if METRICS_ENABLED else _NULL_SPAN
+
+def timed(stage):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not METRICS_ENABLED: return fn(*args, **kwargs)
+            t0 = perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: observe(stage, perf_counter() - t0)
+        return inner
+    return wrap
+
+# --- 3. REPORTING & EXPORT ---
+def snapshot():
+    """Per-stage rolling stats (ms) plus counters."""
+    with _lock:
+        stages = {s: (np.array(v), list(_totals[s])) for s, v in _samples.items()}
+        counters = dict(_counters)
+    rows = [{'stage': s, 'calls': tot[0], 'last_ms': v[-1] * 1e3, 'p50_ms': np.percentile(v, 50) * 1e3,
+             'p95_ms': np.percentile(v, 95) * 1e3, 'total_s': tot[1]} for s, (v, tot) in sorted(stages.items())]
+    return {'stages': rows, 'counters': counters}
+
+def cache_stats(name):
+    with _lock: calls, misses = _counters.get(f'{name}.calls', 0), _counters.get(f'{name}.miss', 0)
+    return {'hits': calls - misses, 'misses': misses, 'hit_rate': (calls - misses) / calls if calls else None}
+
+def prometheus_text(prefix='market_mind'):
+    with _lock:
+        buckets = {s: list(b) for s, b in _buckets.items()}
+        totals = {s: list(t) for s, t in _totals.items()}
+        counters = dict(_counters)
+    out = [f'# HELP {prefix}_stage_latency_seconds Pipeline stage latency.', f'# TYPE {prefix}_stage_latency_seconds histogram']
+    for stage in sorted(buckets):
+        cumulative = np.cumsum(buckets[stage])
+        for le, n in zip(list(BUCKETS_S) + ['+Inf'], cumulative): out.append(f'{prefix}_stage_latency_seconds_bucket{{stage="{stage}",le="{le}"}} {n}')
+        out.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {totals[stage][1]}')
+        out.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {totals[stage][0]}')
+    out += [f'# HELP {prefix}_events_total Event counters (cache calls/misses, syncs).', f'# TYPE {prefix}_events_total counter']
+    out += [f'{prefix}_events_total{{event="{name}"}} {n}' for name, n in sorted(counters.items())]
+    return '\n'.join(out) + '\n'
+
+def write_metrics(path=None):
+    path = path or METRICS_FILE
+    if not path: return
+    text = prometheus_text() if path.endswith('.prom') else json.dumps(snapshot(), indent=2)
+    with _write_lock:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.')
+        try:
+            with os.fdopen(fd, 'w') as f: f.write(text)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
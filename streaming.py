@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import queue
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from market_engine import (CANDLE_MINUTES, CT_TZ, NY_SESSION_END, NY_SESSION_START, calculate_ladder, generate_ny_signal,
+                           get_target_time)
+
+# --- 1. STREAM CONSTANTS ---
+SESSION_OPEN = datetime.strptime(NY_SESSION_START, '%H:%M').time()
+SESSION_CLOSE = datetime.strptime(NY_SESSION_END, '%H:%M').time()
+BAR_FREQ = f'{CANDLE_MINUTES}min'
+
+def _to_ct(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize(CT_TZ) if ts.tzinfo is None else ts.tz_convert(CT_TZ)
+
+# --- 2. TICK AGGREGATION ---
+class CandleAggregator:
+    """Folds ticks into 30m candles; every tick returns the current (still forming) bar as a revision."""
+    def __init__(self):
+        self.bar = None
+
+    def on_tick(self, ts, price, size=0.0):
+        start = _to_ct(ts).floor(BAR_FREQ)
+        if self.bar is None or start > self.bar[0]: self.bar = [start, price, price, price, price, size]
+        elif start == self.bar[0]:
+            self.bar[2], self.bar[3] = max(self.bar[2], price), min(self.bar[3], price)
+            self.bar[4], self.bar[5] = price, self.bar[5] + size
+        return tuple(self.bar)
+
+# --- 3. INCREMENTAL NY PIPELINE ---
+class NYSignalStream:
+    """Keeps the anchor session's inflections, its ladder and the NY signal current as bars arrive.
+    The anchor is the latest NY session seen, as the app defaults to. Bars re-sent with the last timestamp
+    revise that bar; bars older than it are dropped. Subscribers only hear about signal changes."""
+    def __init__(self, offset=0.0, target_hour=9):
+        self.offset, self.target_hour = offset, target_hour
+        self.subscribers, self.aggregator = [], CandleAggregator()
+        self.price, self.last_signal, self.last_ts = None, None, None
+        self._reset_session(None)
+
+    def subscribe(self, fn):
+        self.subscribers.append(fn)
+        return fn
+
+    def _reset_session(self, anchor_date):
+        self.anchor_date, self.target_time = anchor_date, get_target_time(anchor_date, self.target_hour) if anchor_date else None
+        self.times, self.opens, self.highs, self.lows, self.closes = [], [], [], [], []
+        self.bounces, self.rejections, self.inflections, self.ladder = [], [], None, []
+
+    def _update_inflections(self):
+        # Only the last two bars can change role: the new/revised bar is the session's right edge and
+        # its neighbour stops (or starts) being one. Same rules as detect_inflection_points.
+        c, n = self.closes, len(self.closes)
+        if n < 2:
+            self.inflections, self.ladder = None, []
+            return
+        k = n - 2
+        self.bounces = [b for b in self.bounces if b['time'] < self.times[k]]
+        self.rejections = [r for r in self.rejections if r['time'] < self.times[k]]
+        for i in (k, k + 1):
+            left_lt, left_gt = i == 0 or c[i] < c[i-1], i == 0 or c[i] > c[i-1]
+            right_lt, right_gt = i == n - 1 or c[i] < c[i+1], i == n - 1 or c[i] > c[i+1]
+            if left_lt and right_lt: self.bounces.append({'time': self.times[i], 'price': c[i]})
+            if left_gt and right_gt: self.rejections.append({'time': self.times[i], 'price': c[i]})
+        hw_i = lw_i = None
+        for i in range(n):
+            if c[i] < self.opens[i] and (hw_i is None or self.highs[i] > self.highs[hw_i]): hw_i = i
+            if c[i] > self.opens[i] and (lw_i is None or self.lows[i] < self.lows[lw_i]): lw_i = i
+        self.inflections = {'bounces': list(self.bounces), 'rejections': list(self.rejections),
+                            'hw': {'time': self.times[hw_i], 'price': self.highs[hw_i]} if hw_i is not None else None,
+                            'lw': {'time': self.times[lw_i], 'price': self.lows[lw_i]} if lw_i is not None else None}
+        self.ladder = calculate_ladder(self.inflections, self.target_time, offset=self.offset)
+
+    def on_bar(self, ts, o, h, l, c, v=0.0):
+        ts = _to_ct(ts)
+        if self.last_ts is not None and ts < self.last_ts: return None # Stale bar, in or out of session
+        self.last_ts = ts
+        if SESSION_OPEN <= ts.time() <= SESSION_CLOSE:
+            if self.anchor_date is None or ts.date() > self.anchor_date: self._reset_session(ts.date())
+            if self.times and ts == self.times[-1]:
+                self.opens[-1], self.highs[-1], self.lows[-1], self.closes[-1] = o, h, l, c
+            else:
+                for series, val in ((self.times, ts), (self.opens, o), (self.highs, h), (self.lows, l), (self.closes, c)): series.append(val)
+            self._update_inflections()
+        self.price = c
+        return self._update_signal(ts)
+
+    def on_tick(self, ts, price, size=0.0):
+        return self.on_bar(*self.aggregator.on_tick(ts, price, size))
+
+    def _update_signal(self, ts):
+        if not self.ladder: return None
+        signal, reason, css_class = generate_ny_signal(self.ladder, self.price - self.offset)
+        if (signal, reason) == self.last_signal: return None
+        self.last_signal = (signal, reason)
+        event = {'time': ts, 'anchor_date': self.anchor_date, 'target_time': self.target_time, 'price': self.price - self.offset,
+                 'signal': signal, 'reason': reason, 'css_class': css_class}
+        for fn in self.subscribers: fn(event)
+        return event
+
+# --- 4. SOURCES & DRIVERS ---
+def replay_source(path, delay=0.0):
+    """Bars (ts, open, high, low, close, volume) from a CSV with a datetime index, optionally paced."""
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True).tz_convert(CT_TZ)
+    volume = df['Volume'] if 'Volume' in df else pd.Series(0.0, index=df.index)
+    for bar in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], volume):
+        if delay: time.sleep(delay)
+        yield bar
+
+def queue_source(q: queue.Queue, stop=None):
+    while (item := q.get()) is not stop: yield item
+
+async def async_queue_source(q: asyncio.Queue, stop=None):
+    while (item := await q.get()) is not stop: yield item
+
+def run(source, stream, ticks=False):
+    handler = stream.on_tick if ticks else stream.on_bar
+    for item in source: handler(*item)
+    return stream
+
+async def run_async(source, stream, ticks=False):
+    handler = stream.on_tick if ticks else stream.on_bar
+    async for item in source: handler(*item)
+    return stream
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a 30m bar file through the streaming NY signal pipeline.")
+    parser.add_argument('replay', help="CSV with a datetime index and Open/High/Low/Close[/Volume] columns")
+    parser.add_argument('--offset', type=float, default=0.0)
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait between bars")
+    args = parser.parse_args()
+
+    stream = NYSignalStream(offset=args.offset)
+    stream.subscribe(lambda e: print(json.dumps({**e, 'time': e['time'].isoformat(), 'anchor_date': e['anchor_date'].isoformat(), 'target_time': e['target_time'].isoformat()}), flush=True))
+    run(replay_source(args.replay, args.delay), stream)
+
+if __name__ == "__main__":
+    main()
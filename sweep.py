@@ -0,0 +1,156 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import CHUNK_SESSIONS, ENTRY_HOUR, EXIT_HOUR, chunk_frames, load_history, run_chunks
+from market_engine import (CANDLE_MINUTES, NY_SESSION_END, NY_SESSION_START, RATE_PER_CANDLE, count_candles_between_batch,
+                           detect_inflection_points_batch, get_target_time)
+
+# --- 1. SWEEP CONSTANTS ---
+DEFAULT_RATES = np.round(np.arange(0.30, 0.801, 0.02), 2) # Brackets RATE_PER_CANDLE
+DEFAULT_TARGETS = ((ENTRY_HOUR, EXIT_HOUR), (18, 19)) # NY 0DTE window and the Asian 6-7 PM scalp
+MIN_SIGNALS = 30 # Parameter sets with fewer directional calls are left out of the ranking
+PARAM_COLUMNS = ['rate', 'candle_minutes', 'session_start', 'session_end', 'entry_hour', 'exit_hour']
+COUNT_COLUMNS = ['sessions', 'signals', 'calls', 'puts', 'hits', 'edge']
+
+# --- 2. PER-SESSION PRECOMPUTATION ---
+def resample_bars(df, candle_minutes):
+    bar = df.index.to_series().diff().min()
+    if pd.Timedelta(minutes=candle_minutes) < bar: raise ValueError(f"{candle_minutes}m candles are finer than the {bar} history")
+    if pd.Timedelta(minutes=candle_minutes) == bar: return df
+    return df.resample(f'{candle_minutes}min', label='left', closed='left').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}).dropna()
+
+def session_outcomes(df, dates, entry_hour, exit_hour):
+    """Entry open and exit close of the window each anchor date is traded in, as score_session takes them (NaN: no bars)."""
+    t_in = pd.DatetimeIndex([get_target_time(d, entry_hour) for d in dates])
+    t_out = pd.DatetimeIndex([get_target_time(d, exit_hour) for d in dates])
+    first, last = df.index.searchsorted(t_in, 'left'), df.index.searchsorted(t_out, 'right') - 1
+    live = first <= last
+    opens, closes = np.asarray(df['Open'], dtype=float), np.asarray(df['Close'], dtype=float)
+    entry = np.where(live, opens[np.clip(first, 0, len(df) - 1)], np.nan)
+    exit_ = np.where(live, closes[np.clip(last, 0, len(df) - 1)], np.nan)
+    return entry, exit_
+
+# --- 3. VECTORIZED SIGNAL ---
+def ladder_signals(session, is_asc, prices, counts, entry, rates):
+    """generate_ny_signal for every (rate, session) at once: 1 CALL, -1 PUT, 0 WAIT.
+    Rows are ladder anchors grouped contiguously by `session` (0..n-1); entry holds one price per session."""
+    starts = np.flatnonzero(np.r_[True, session[1:] != session[:-1]])
+    vals = prices + np.where(is_asc, 1.0, -1.0) * rates[:, None] * counts # Same float ops as calculate_ladder
+    row_entry = entry[session]
+    fold = lambda ufunc, mask, fill: ufunc.reduceat(np.where(mask, vals, fill), starts, axis=1)
+    up, down = vals > row_entry, vals < row_entry
+    has_asc, has_desc = np.logical_or.reduceat(is_asc, starts), np.logical_or.reduceat(~is_asc, starts)
+    below_all_asc = has_asc & (fold(np.minimum, is_asc, np.inf) > entry)
+    above_all_asc = has_asc & (fold(np.maximum, is_asc, -np.inf) < entry)
+    below_all_desc = has_desc & (fold(np.minimum, ~is_asc, np.inf) > entry)
+    above_all_desc = has_desc & (fold(np.maximum, ~is_asc, -np.inf) < entry)
+
+    # Nearest line above / below and its direction; on equal values the ladder's sort order resolves
+    # the line above to the later (descending) anchor and the line below to the earlier (ascending) one
+    asc_up, desc_up = fold(np.minimum, is_asc & up, np.inf), fold(np.minimum, ~is_asc & up, np.inf)
+    asc_down, desc_down = fold(np.maximum, is_asc & down, -np.inf), fold(np.maximum, ~is_asc & down, -np.inf)
+    bracketed = (np.minimum(asc_up, desc_up) < np.inf) & (np.maximum(asc_down, desc_down) > -np.inf)
+    capped_desc, propped_asc = desc_up <= asc_up, asc_down >= desc_down
+    return np.select([below_all_asc & below_all_desc, above_all_asc & above_all_desc, below_all_asc, above_all_asc,
+                      bracketed & ~capped_desc & ~propped_asc, bracketed & capped_desc, bracketed & propped_asc],
+                     [-1, 1, -1, 1, 0, -1, 1], 0).astype(np.int8)
+
+def sweep_chunk(frame, dates, candle_minutes, window, targets, rates):
+    """Scores every (rate, target window) of one candle size and session window over a chunk of anchor sessions.
+    Inflections are detected once, candle counts once per target, and the rate axis is one broadcast."""
+    rates = np.asarray(rates, dtype=float)
+    batch = detect_inflection_points_batch(resample_bars(frame, candle_minutes), *window)
+    flat = sorted(set(batch.attrs['sessions'].astype(object)) & set(dates) - set(batch['date'])) # Empty ladder: always WAIT
+    batch = batch[batch['date'].isin(set(dates))] # The chunk frame also holds the day after, which only gets traded
+    if batch.empty and not flat: return pd.DataFrame(columns=PARAM_COLUMNS + COUNT_COLUMNS)
+    session, days = pd.factorize(batch['date'])
+    is_asc, prices, anchor_times = batch['kind'].isin(['HW', 'B']).to_numpy(), batch['price'].to_numpy(dtype=float), pd.DatetimeIndex(batch['time'])
+
+    parts = []
+    for entry_hour, exit_hour in targets:
+        entry, exit_ = session_outcomes(frame, days, entry_hour, exit_hour)
+        live = ~np.isnan(entry)
+        flat_live = int((~np.isnan(session_outcomes(frame, flat, entry_hour, exit_hour)[0])).sum()) if flat else 0
+        keep = live[session]
+        if not keep.any() and not flat_live: continue
+        signal = np.zeros((len(rates), 0), dtype=np.int8)
+        if keep.any():
+            target_times = pd.DatetimeIndex([get_target_time(d, entry_hour) for d in days])
+            counts = count_candles_between_batch(anchor_times[keep], target_times[session[keep]], candle_minutes)
+            signal = ladder_signals((np.cumsum(live) - 1)[session[keep]], is_asc[keep], prices[keep], counts, entry[live], rates)
+        move = (exit_ - entry)[live]
+        hits = ((signal == 1) & (move > 0)) | ((signal == -1) & (move < 0))
+        parts.append(pd.DataFrame({
+            'rate': rates, 'candle_minutes': candle_minutes, 'session_start': window[0], 'session_end': window[1],
+            'entry_hour': entry_hour, 'exit_hour': exit_hour, 'sessions': int(live.sum()) + flat_live, 'signals': (signal != 0).sum(axis=1),
+            'calls': (signal == 1).sum(axis=1), 'puts': (signal == -1).sum(axis=1), 'hits': hits.sum(axis=1), 'edge': (signal * move).sum(axis=1),
+        }))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=PARAM_COLUMNS + COUNT_COLUMNS)
+
+# --- 4. PARALLEL DRIVER & RANKING ---
+def backtest_counts(trades):
+    """run_backtest trades folded into COUNT_COLUMNS, for checking a sweep row against the scalar replay."""
+    side = np.select([trades['signal'] == "CALL", trades['signal'] == "PUT"], [1, -1], 0)
+    return {'sessions': len(trades), 'signals': int((side != 0).sum()), 'calls': int((side == 1).sum()), 'puts': int((side == -1).sum()),
+            'hits': int(trades['hit'].sum()), 'edge': float((side * (trades['exit'] - trades['entry'])).sum())}
+
+def run_sweep(df, rates=DEFAULT_RATES, candle_sizes=(CANDLE_MINUTES,), windows=((NY_SESSION_START, NY_SESSION_END),),
+              targets=DEFAULT_TARGETS, workers=None, chunk_sessions=CHUNK_SESSIONS, checkpoint_dir=None):
+    """Evaluates the full parameter grid over every session of df across a process pool.
+    Returns one row per parameter set with summed counts; rank() turns them into accuracies."""
+    rates, targets = [float(r) for r in rates], [tuple(t) for t in targets]
+    chunks = chunk_frames(df, chunk_sessions)
+    jobs = [(frame, chunk, (candle_minutes, tuple(window), targets, rates),
+             {'sweep': True, 'rates': rates, 'candle_minutes': candle_minutes, 'window': list(window), 'targets': targets, 'chunk_sessions': chunk_sessions})
+            for candle_minutes, window, (chunk, frame) in itertools.product(candle_sizes, windows, chunks)]
+    results = run_chunks(sweep_chunk, jobs, checkpoint_dir, workers)
+    if not results: return pd.DataFrame(columns=PARAM_COLUMNS + COUNT_COLUMNS)
+    return pd.concat(results, ignore_index=True).groupby(PARAM_COLUMNS, sort=False)[COUNT_COLUMNS].sum().reset_index()
+
+def rank(results, min_signals=MIN_SIGNALS):
+    """Accuracy = share of CALL/PUT signals the window closed in favour of; edge_pts = mean points moved in the signal's direction."""
+    ranked = results[results['signals'] >= max(min_signals, 1)]
+    ranked = ranked.assign(accuracy=ranked['hits'] / ranked['signals'], coverage=ranked['signals'] / ranked['sessions'], edge_pts=ranked['edge'] / ranked['signals'])
+    return ranked.sort_values(['accuracy', 'edge_pts', 'signals'], ascending=False, ignore_index=True)
+
+# --- 5. CLI ---
+def _parse_rates(tokens):
+    # Either explicit values or start:stop:step (stop inclusive)
+    if len(tokens) == 1 and ':' in tokens[0]:
+        start, stop, step = map(float, tokens[0].split(':'))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return [float(t) for t in tokens]
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep cone rate, candle size, session window and target windows over a local 30m history.")
+    parser.add_argument('history', help="CSV or Parquet with a datetime index and Open/High/Low/Close columns")
+    parser.add_argument('--rates', nargs='+', default=None, help=f"Points per candle, as values or start:stop:step (default 0.30:0.80:0.02; live is {RATE_PER_CANDLE})")
+    parser.add_argument('--candles', nargs='+', type=int, default=[CANDLE_MINUTES], help="Candle sizes in minutes; must divide 60")
+    parser.add_argument('--windows', nargs='+', default=[f'{NY_SESSION_START}-{NY_SESSION_END}'], help="Anchor session windows as HH:MM-HH:MM")
+    parser.add_argument('--targets', nargs='+', default=[f'{a}-{b}' for a, b in DEFAULT_TARGETS], help="Entry-exit hours CT on the next trading day, e.g. 9-15 9.5-15")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-sessions', type=int, default=CHUNK_SESSIONS)
+    parser.add_argument('--checkpoint-dir', default=None)
+    parser.add_argument('--min-signals', type=int, default=MIN_SIGNALS)
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--out', default=None, help="Write the full ranking as CSV")
+    args = parser.parse_args()
+
+    rates = _parse_rates(args.rates) if args.rates else DEFAULT_RATES
+    windows = [tuple(w.split('-')) for w in args.windows]
+    targets = [tuple(float(h) for h in t.split('-')) for t in args.targets]
+    df = load_history(args.history)
+    t0 = time.perf_counter()
+    results = run_sweep(df, rates, args.candles, windows, targets, args.workers, args.chunk_sessions, args.checkpoint_dir)
+    evaluated = int(results['sessions'].sum()) if not results.empty else 0
+    print(f"{len(results)} parameter sets, {evaluated} parameter/session combinations in {time.perf_counter() - t0:.1f}s")
+    ranked = rank(results, args.min_signals)
+    if args.out: ranked.to_csv(args.out, index=False)
+    print(ranked.head(args.top).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
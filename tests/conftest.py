@@ -0,0 +1,27 @@
+import os
+import sys
+
+# The modules live flat at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+import pytest
+
+from benchmarks.synthetic import synthetic_es_bars
+from market_engine import filter_ny_session
+
+FLAT_DAY, SHORT_DAY = date(2015, 3, 10), date(2015, 3, 12) # FLAT_DAY is traded on an intact 3/11
+
+@pytest.fixture
+def history():
+    """Deterministic OHLC history: history(seed, sessions=12)."""
+    return lambda seed, sessions=12: synthetic_es_bars(sessions, seed=seed)[['Open', 'High', 'Low', 'Close']]
+
+@pytest.fixture
+def flat_history():
+    """Synthetic bars with one all-doji NY session at a single price (FLAT_DAY) and one cut to a single bar (SHORT_DAY)."""
+    df = synthetic_es_bars(25, seed=9)
+    flat = df.index.isin(filter_ny_session(df, FLAT_DAY).index)
+    df.loc[flat, ['Open', 'High', 'Low', 'Close']] = 2000.0
+    return df.drop(filter_ny_session(df, SHORT_DAY).index[1:])
@@ -0,0 +1,28 @@
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from backtest import run_backtest
+from sweep import run_sweep
+
+@pytest.mark.parametrize('driver', [run_backtest, partial(run_sweep, rates=(0.4, 0.52))], ids=['backtest', 'sweep'])
+def test_checkpoints_do_not_leak_between_histories(tmp_path, history, driver):
+    a, b = history(1), history(2)
+    fresh_b = driver(b, workers=1, chunk_sessions=4)
+    driver(a, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path)
+    pd.testing.assert_frame_equal(driver(b, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path), fresh_b, check_dtype=False)
+
+def test_checkpoints_are_reused_for_the_same_history(tmp_path, history):
+    df = history(3)
+    first = run_backtest(df, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path)
+    written = sorted(tmp_path.rglob('*.pkl'))
+    pd.testing.assert_frame_equal(run_backtest(df, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path), first)
+    assert sorted(tmp_path.rglob('*.pkl')) == written
+
+def test_appended_history_rescores_the_open_chunk(tmp_path, history):
+    full = history(4, sessions=16)
+    cut = full.loc[:str(sorted(set(full.index.date))[7])] # Last anchor of the second chunk, without its next session
+    run_backtest(cut, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path)
+    pd.testing.assert_frame_equal(run_backtest(full, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path),
+                                  run_backtest(full, workers=1, chunk_sessions=4))
@@ -0,0 +1,36 @@
+import numpy as np
+
+import market_engine
+from market_engine import ENTRY_T, bs_chain, bs_chain_grid, bs_implied_vol
+
+def test_implied_vol_round_trips():
+    strikes = np.arange(4800.0, 5205.0, 5.0)
+    for T in (ENTRY_T, 0.25):
+        for opt in 'CP':
+            prices = bs_chain(5000.0, strikes, T, 0.05, 0.15, opt)['premium']
+            iv = bs_implied_vol(prices, 5000.0, strikes, T, 0.05, opt)
+            solved = ~np.isnan(iv)
+            assert solved.sum() > len(strikes) // 3
+            np.testing.assert_allclose(iv[solved], 0.15, atol=1e-6)
+
+def test_implied_vol_is_nan_where_vol_does_not_move_the_price():
+    # One day out, these strikes sit 8+ sigma from the money: the premium is its bound to machine precision
+    strikes = np.array([1800.0, 1820.0, 1840.0, 2200.0, 2250.0])
+    prices = bs_chain(2000.0, strikes, 1 / 365, 0.05, 0.15, 'C')['premium']
+    assert np.isnan(bs_implied_vol(prices, 2000.0, strikes, 1 / 365, 0.05, 'C')).all()
+
+def test_implied_vol_is_nan_outside_arbitrage_bounds_and_at_expiry():
+    assert np.isnan(bs_implied_vol(0.0, 5000.0, 5000.0, ENTRY_T, 0.05, 'C'))
+    assert np.isnan(bs_implied_vol(6000.0, 5000.0, 5000.0, ENTRY_T, 0.05, 'C'))
+    assert np.isnan(bs_implied_vol(10.0, 5000.0, 5000.0, 0.0, 0.05, 'C'))
+
+def test_chain_grid_chunks_stay_within_max_cells_and_match_one_pass(monkeypatch):
+    strikes, times, vols = np.arange(4900.0, 5105.0, 5.0), np.linspace(ENTRY_T, 0.0, 13), np.linspace(0.1, 0.4, 7)
+    whole = bs_chain_grid(5000.0, strikes, times, vols, 0.05, 'P', max_cells=10**9)
+    sizes, chain = [], market_engine.bs_chain
+    monkeypatch.setattr(market_engine, 'bs_chain', lambda *a: sizes.append(np.broadcast(*a[1:5]).size) or chain(*a))
+    for max_cells in (1, 5, 40, 100):
+        sizes.clear()
+        chunked = bs_chain_grid(5000.0, strikes, times, vols, 0.05, 'P', max_cells=max_cells)
+        assert max(sizes) <= max_cells and sum(sizes) == strikes.size * times.size * vols.size
+        for k in whole: np.testing.assert_array_equal(chunked[k], whole[k])
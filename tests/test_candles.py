@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import reference
+from market_engine import CT_TZ, count_candles_between, count_candles_between_batch
+
+FALL_BACK = datetime(2017, 11, 1, 18, 15) # Walks from here cross the 2017-11-05 change
+
+def _starts(kind):
+    walls = [FALL_BACK + timedelta(minutes=15 * i) for i in range(0, 400, 7)]
+    if kind == 'naive': return walls
+    if kind == 'aware': return [CT_TZ.localize(w) for w in walls]
+    return list(pd.DatetimeIndex(walls).tz_localize(CT_TZ, ambiguous=False))
+
+@pytest.mark.parametrize('kind', ['naive', 'aware', 'timestamp'])
+def test_batch_matches_scalar_across_dst(kind):
+    starts = _starts(kind)
+    ends = [s + timedelta(minutes=30 * (50 + 13 * i)) for i, s in enumerate(starts)]
+    expected = [count_candles_between(s, e) for s, e in zip(starts, ends)]
+    assert count_candles_between_batch(starts, ends).tolist() == expected
+
+def test_scalar_matches_original_walk_for_naive_start():
+    end = datetime(2017, 11, 10, 9)
+    assert count_candles_between(FALL_BACK, end) == reference.count_candles_between(FALL_BACK, end)
+    assert count_candles_between_batch([FALL_BACK], [end])[0] == reference.count_candles_between(FALL_BACK, end)
+
+def test_batch_broadcasts_a_scalar_start():
+    ends = pd.date_range('2017-11-02', periods=20, freq='7h', tz=CT_TZ)
+    counts = count_candles_between_batch(FALL_BACK, ends)
+    assert counts.tolist() == [count_candles_between(FALL_BACK, e) for e in ends]
+    assert np.all(np.diff(counts) >= 0)
@@ -0,0 +1,17 @@
+from benchmarks import reference
+from market_engine import detect_inflection_points, detect_inflection_points_batch, filter_ny_session, inflections_for_date
+
+from conftest import FLAT_DAY, SHORT_DAY
+
+def test_batch_matches_the_original_scalar_detector_session_by_session(flat_history):
+    df = flat_history
+    batch = detect_inflection_points_batch(df)
+    for d in sorted(set(df.index.date)):
+        expected = reference.detect_inflection_points(filter_ny_session(df, d))
+        assert inflections_for_date(batch, d) == expected == detect_inflection_points(filter_ny_session(df, d))
+
+def test_flat_and_single_bar_sessions(flat_history):
+    batch = detect_inflection_points_batch(flat_history)
+    assert inflections_for_date(batch, FLAT_DAY) == {'bounces': [], 'rejections': [], 'hw': None, 'lw': None}
+    assert inflections_for_date(batch, SHORT_DAY) is None
+    assert inflections_for_date(batch.iloc[:0], FLAT_DAY) == inflections_for_date(batch, FLAT_DAY)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journal import PAGE_SIZE, count_entries, fetch_page, import_trades, record_outcomes, record_signals, win_rate_by_score
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'journal.sqlite')
+
+def _entries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2026-01-05', periods=40).strftime('%Y-%m-%d')
+    return [{'session_date': dates[rng.integers(len(dates))], 'signal': ['CALL', 'PUT', 'WAIT'][rng.integers(3)],
+             'score': int(rng.integers(0, 6)), 'contracts': int(rng.integers(0, 4)), 'price': 5000.0} for _ in range(n)]
+
+def _all(path, **filters):
+    pages, before = [], None
+    while True:
+        page = fetch_page(before, path=path, **filters)
+        pages.append(page)
+        if len(page) < PAGE_SIZE: return pd.concat(pages, ignore_index=True)
+        before = (page['session_date'].iloc[-1], int(page['id'].iloc[-1]))
+
+def test_keyset_pages_walk_every_entry_newest_first(path):
+    assert record_signals(_entries(173), path) == 173
+    rows = _all(path)
+    assert len(rows) == count_entries(path) == 173
+    assert rows['id'].is_unique
+    keys = list(zip(rows['session_date'], rows['id']))
+    assert keys == sorted(keys, reverse=True)
+
+def test_filters_apply_to_pages_and_counts(path):
+    record_signals(_entries(120, seed=1), path)
+    rows = _all(path, signal='CALL', min_score=3, start='2026-01-20')
+    assert len(rows) == count_entries(path, signal='CALL', min_score=3, start='2026-01-20')
+    assert (rows['signal'] == 'CALL').all() and (rows['score'] >= 3).all() and (rows['session_date'] >= '2026-01-20').all()
+
+def test_outcomes_derive_pnl_per_contract(path):
+    record_signals([{'session_date': '2026-01-05', 'signal': 'CALL', 'contracts': 2},
+                    {'session_date': '2026-01-05', 'signal': 'PUT', 'contracts': None}], path)
+    ids = fetch_page(path=path).sort_values('id')['id'].tolist()
+    assert record_outcomes([(ids[0], 2.0, 3.5), (ids[1], 4.0, 1.0), (999, 1.0, 2.0)], path) == 2
+    rows = fetch_page(path=path).set_index('id')
+    assert rows.loc[ids[0], 'pnl'] == pytest.approx(300.0) and rows.loc[ids[0], 'outcome'] == 'WIN'
+    assert rows.loc[ids[1], 'pnl'] == pytest.approx(-300.0) and rows.loc[ids[1], 'outcome'] == 'LOSS'
+
+def test_no_trade_entries_get_no_pnl_or_outcome(path):
+    record_signals([{'session_date': '2026-01-05', 'signal': 'WAIT', 'score': 1, 'contracts': 0}], path)
+    entry_id = int(fetch_page(path=path)['id'].iloc[0])
+    assert record_outcomes([(entry_id, 1.0, 2.0)], path) == 1
+    row = fetch_page(path=path).iloc[0]
+    assert row['fill_premium'] == 1.0 and row['exit_premium'] == 2.0
+    assert pd.isna(row['pnl']) and row['outcome'] is None
+    assert win_rate_by_score(path).empty
+
+def test_win_rate_by_score_matches_pandas(path):
+    entries = [e for e in _entries(300, seed=2) if e['contracts']]
+    record_signals(entries, path)
+    rng = np.random.default_rng(3)
+    rows = fetch_page(limit=len(entries), path=path)
+    record_outcomes([(i, 2.0, float(x)) for i, x in zip(rows['id'], rng.choice([1.0, 2.0, 3.0], len(rows)))], path)
+    resolved = fetch_page(limit=len(entries), path=path)
+    bucket = resolved['score'].map(lambda s: '4-5' if s >= 4 else '3' if s == 3 else '2' if s == 2 else '0-1')
+    expected = resolved.groupby(bucket).agg(trades=('id', 'size'), win_rate=('outcome', lambda o: (o == 'WIN').mean()), total_pnl=('pnl', 'sum'))
+    stats = win_rate_by_score(path).set_index('score_bucket')
+    assert stats['trades'].to_dict() == expected['trades'].to_dict()
+    np.testing.assert_allclose(stats.loc[expected.index, 'win_rate'], expected['win_rate'])
+    np.testing.assert_allclose(stats.loc[expected.index, 'total_pnl'], expected['total_pnl'])
+
+def test_import_trades_loads_backtest_rows(path):
+    trades = pd.DataFrame({'date': ['2026-01-05', '2026-01-06'], 'target_time': ['2026-01-06 09:00', '2026-01-07 09:00'], 'signal': ['CALL', 'WAIT'],
+                           'reason': ['r', 'w'], 'entry': [5000.0, 5010.0], 'strike': [5020.0, np.nan], 'prem_entry': [3.0, np.nan],
+                           'prem_exit': [5.0, np.nan], 'pnl': [200.0, np.nan]})
+    assert import_trades(trades, path) == 2
+    stats = win_rate_by_score(path)
+    assert stats['trades'].sum() == 1 and stats['total_pnl'].sum() == pytest.approx(200.0)
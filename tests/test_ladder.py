@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_inflections
+from market_engine import CT_TZ, calculate_ladder, calculate_ladder_grid, get_session_target_times, ladder_from_grid
+
+def _tied_inflections():
+    # Equal highest bounces, equal lowest rejections, and a bounce projecting onto the highest wick
+    at = lambda hhmm: pd.Timestamp(f'2015-03-06 {hhmm}').tz_localize(CT_TZ)
+    return {'hw': {'time': at('09:00'), 'price': 2010.0}, 'lw': {'time': at('10:00'), 'price': 1990.0},
+            'bounces': [{'time': at('09:00'), 'price': 2010.0}, {'time': at('11:00'), 'price': 2005.0}, {'time': at('11:00'), 'price': 2005.0}],
+            'rejections': [{'time': at('12:00'), 'price': 1995.0}, {'time': at('12:00'), 'price': 1995.0}, {'time': at('10:00'), 'price': 1990.0}]}
+
+@pytest.mark.parametrize('inflections', [synthetic_inflections(12, seed=3), _tied_inflections()], ids=['synthetic', 'ties'])
+def test_grid_matches_calculate_ladder_for_every_target_and_offset(inflections):
+    targets, offsets = get_session_target_times(inflections['hw']['time'].date()), [0.0, 2.5, -7.25]
+    grid = calculate_ladder_grid(inflections, targets, offsets)
+    for t in targets:
+        for o in offsets: assert ladder_from_grid(grid, t, o) == calculate_ladder(inflections, t, o)
@@ -0,0 +1,68 @@
+import json
+import pickle
+import threading
+
+import pytest
+
+import metrics
+from market_engine import calculate_ladder, detect_inflection_points_batch
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    metrics.set_enabled(True)
+    yield
+    metrics.reset()
+
+def _bucket_lines(text, stage):
+    return {line.split('le="')[1].split('"')[0]: int(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line.startswith(f'market_mind_stage_latency_seconds_bucket{{stage="{stage}"')}
+
+def test_samples_on_a_bucket_edge_count_as_le():
+    for seconds in (0.001, 0.0010001, 5.0, 7.0): metrics.observe('s', seconds)
+    buckets = _bucket_lines(metrics.prometheus_text(), 's')
+    assert buckets['0.0005'] == 0
+    assert buckets['0.001'] == 1
+    assert buckets['0.005'] == 2
+    assert buckets['5.0'] == 3
+    assert buckets['+Inf'] == 4
+
+def test_prometheus_text_format():
+    metrics.observe('load', 0.002)
+    metrics.observe('load', 0.02)
+    metrics.count('pipeline.calls', 3)
+    lines = metrics.prometheus_text().splitlines()
+    assert lines[:2] == ['# HELP market_mind_stage_latency_seconds Pipeline stage latency.',
+                         '# TYPE market_mind_stage_latency_seconds histogram']
+    buckets = [l for l in lines if l.startswith('market_mind_stage_latency_seconds_bucket')]
+    assert len(buckets) == len(metrics.BUCKETS_S) + 1
+    assert buckets[-1] == 'market_mind_stage_latency_seconds_bucket{stage="load",le="+Inf"} 2'
+    assert 'market_mind_stage_latency_seconds_count{stage="load"} 2' in lines
+    assert float(next(l for l in lines if l.startswith('market_mind_stage_latency_seconds_sum')).rsplit(' ', 1)[1]) == pytest.approx(0.022)
+    assert '# TYPE market_mind_events_total counter' in lines
+    assert lines[-1] == 'market_mind_events_total{event="pipeline.calls"} 3'
+
+def test_cache_stats():
+    assert metrics.cache_stats('pipeline') == {'hits': 0, 'misses': 0, 'hit_rate': None}
+    metrics.count('pipeline.calls', 4)
+    metrics.count('pipeline.miss')
+    assert metrics.cache_stats('pipeline') == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+def test_concurrent_writes_leave_one_complete_file(tmp_path):
+    metrics.observe('load', 0.002)
+    path, errors = tmp_path / 'metrics.json', []
+    def writer():
+        try:
+            for _ in range(100): metrics.write_metrics(str(path))
+        except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
+    assert json.loads(path.read_text())['stages'][0]['stage'] == 'load'
+    assert [p.name for p in tmp_path.iterdir()] == ['metrics.json']
+
+def test_timed_functions_keep_their_identity_and_pickle_by_reference():
+    for fn in (calculate_ladder, detect_inflection_points_batch):
+        assert (fn.__module__, fn.__qualname__) == ('market_engine', fn.__wrapped__.__name__)
+        assert pickle.loads(pickle.dumps(fn)) is fn
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_es_bars
+from market_engine import CT_TZ, STORE_COLUMNS, make_file_fetcher, store_read, store_sync
+
+SYMBOL = 'ES=F'
+
+@pytest.fixture
+def bars():
+    return synthetic_es_bars(6, seed=7)
+
+@pytest.fixture
+def feed(tmp_path):
+    """(publish, fetcher): publish(df) replaces what the file fetcher serves; fetcher records every start it was asked for."""
+    directory = tmp_path / 'feed'
+    directory.mkdir()
+    fetch, starts = make_file_fetcher(str(directory)), []
+    def fetcher(symbol, start=None):
+        starts.append(start)
+        return fetch(symbol, start)
+    fetcher.starts = starts
+    return (lambda df: df.to_csv(directory / f'{SYMBOL}.csv')), fetcher
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / 'store')
+
+def _assert_stored(root, expected):
+    got = store_read(SYMBOL, root=root)
+    assert got.index.tz is not None and str(got.index.tz) == str(CT_TZ)
+    pd.testing.assert_frame_equal(got, expected[STORE_COLUMNS], check_freq=False, check_index_type=False, check_exact=False)
+
+def test_first_sync_stores_everything(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars)
+    assert store_sync(SYMBOL, fetcher, root) == len(bars)
+    assert fetcher.starts == [None]
+    _assert_stored(root, bars)
+
+def test_incremental_sync_fetches_from_the_last_stored_bar(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars.iloc[:100])
+    store_sync(SYMBOL, fetcher, root)
+    publish(bars)
+    assert store_sync(SYMBOL, fetcher, root, force=True) == len(bars)
+    assert fetcher.starts[-1] == bars.index[99]
+    _assert_stored(root, bars)
+
+def test_resync_refreshes_the_unfinished_tail(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars)
+    store_sync(SYMBOL, fetcher, root)
+    revised = bars.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] += 12.5
+    publish(revised)
+    assert store_sync(SYMBOL, fetcher, root, force=True) == len(bars)
+    _assert_stored(root, revised)
+
+def test_recent_sync_is_reused_without_fetching(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars.iloc[:50])
+    store_sync(SYMBOL, fetcher, root)
+    publish(bars)
+    assert store_sync(SYMBOL, fetcher, root) == 50
+    assert len(fetcher.starts) == 1
+
+def test_empty_fetch_keeps_the_store(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars)
+    store_sync(SYMBOL, fetcher, root)
+    assert store_sync(SYMBOL, lambda symbol, start=None: bars.iloc[:0], root, force=True) == len(bars)
+    assert store_sync(SYMBOL, lambda symbol, start=None: None, root, force=True) == len(bars)
+    _assert_stored(root, bars)
+
+def test_naive_fetch_index_is_read_as_utc(bars, root):
+    naive = bars.tz_convert('UTC').tz_localize(None)
+    store_sync(SYMBOL, lambda symbol, start=None: naive, root)
+    _assert_stored(root, bars)
+
+def test_read_slices_on_central_time_bounds(bars, feed, root):
+    publish, fetcher = feed
+    publish(bars)
+    store_sync(SYMBOL, fetcher, root)
+    got = store_read(SYMBOL, start='2015-03-03 08:30', end='2015-03-03 15:00', root=root)
+    assert got.index[0] == pd.Timestamp('2015-03-03 08:30', tz=CT_TZ)
+    assert got.index[-1] == pd.Timestamp('2015-03-03 15:00', tz=CT_TZ)
+    assert len(got) == 14
+
+def test_unsynced_symbol_reads_empty(root):
+    assert store_read(SYMBOL, root=root).empty
@@ -0,0 +1,45 @@
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_es_bars
+from market_engine import calculate_ladder, detect_inflection_points, filter_ny_session, get_target_time
+from streaming import SESSION_CLOSE, SESSION_OPEN, NYSignalStream
+
+def _bars(df):
+    return zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume'])
+
+def test_replay_matches_batch_pipeline_bar_by_bar():
+    df = synthetic_es_bars(4, seed=5)
+    stream = NYSignalStream(offset=1.5)
+    for i, bar in enumerate(_bars(df)):
+        stream.on_bar(*bar)
+        ts = bar[0]
+        if not SESSION_OPEN <= ts.time() <= SESSION_CLOSE: continue
+        expected = detect_inflection_points(filter_ny_session(df.iloc[:i + 1], ts.date()))
+        assert stream.anchor_date == ts.date()
+        assert stream.inflections == expected
+        if expected: assert stream.ladder == calculate_ladder(expected, get_target_time(ts.date(), 9), offset=1.5)
+        else: assert stream.ladder == []
+
+def test_revised_bar_replaces_the_last_one():
+    df = synthetic_es_bars(2, seed=6)
+    session = filter_ny_session(df, date(2015, 3, 3))
+    stream = NYSignalStream()
+    for bar in _bars(session): stream.on_bar(*bar)
+    revised = session.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] -= 25.0
+    stream.on_bar(*list(_bars(revised))[-1])
+    assert len(stream.times) == len(session)
+    assert stream.price == revised['Close'].iloc[-1]
+    assert stream.inflections == detect_inflection_points(revised)
+
+def test_late_bar_from_a_prior_session_is_dropped():
+    df = synthetic_es_bars(3, seed=7)
+    current = filter_ny_session(df, date(2015, 3, 4)).iloc[:6]
+    stream = NYSignalStream()
+    for bar in _bars(current): stream.on_bar(*bar)
+    state = (stream.anchor_date, list(stream.times), stream.inflections, stream.price)
+    late = filter_ny_session(df, date(2015, 3, 3)).loc[[pd.Timestamp('2015-03-03 15:00', tz=df.index.tz)]]
+    assert stream.on_bar(*next(_bars(late))) is None
+    assert (stream.anchor_date, stream.times, stream.inflections, stream.price) == state
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+import market_engine
+from backtest import ENTRY_HOUR, EXIT_HOUR, chunk_frames, replay_chunk
+from market_engine import CANDLE_MINUTES, NY_SESSION_END, NY_SESSION_START, RATE_PER_CANDLE
+from sweep import COUNT_COLUMNS, backtest_counts, run_sweep, sweep_chunk
+
+RATES = (0.4, 0.52)
+
+def test_checkpointed_sweep_matches_a_fresh_one(tmp_path, history):
+    df = history(3)
+    first = run_sweep(df, RATES, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path)
+    pd.testing.assert_frame_equal(run_sweep(df, RATES, workers=1, chunk_sessions=4, checkpoint_dir=tmp_path), first, check_dtype=False)
+    pd.testing.assert_frame_equal(run_sweep(df, RATES, workers=1, chunk_sessions=4), first, check_dtype=False)
+
+def _assert_counts_match(df, rate):
+    (dates, frame), = chunk_frames(df, chunk_sessions=100)
+    row = sweep_chunk(frame, dates, CANDLE_MINUTES, (NY_SESSION_START, NY_SESSION_END), [(ENTRY_HOUR, EXIT_HOUR)], [rate]).iloc[0]
+    expected = backtest_counts(replay_chunk(frame, dates))
+    assert {c: row[c] for c in COUNT_COLUMNS if c != 'edge'} == {c: v for c, v in expected.items() if c != 'edge'}
+    assert row['edge'] == pytest.approx(expected['edge'])
+
+@pytest.mark.parametrize('rate', [0.0, 0.05, RATE_PER_CANDLE, 1.5, 3.0])
+def test_sweep_counts_match_the_backtest_replay(monkeypatch, history, rate):
+    monkeypatch.setattr(market_engine, 'RATE_PER_CANDLE', rate) # The scalar ladder reads the live rate
+    _assert_counts_match(history(11, sessions=40), rate)
+
+def test_flat_sessions_count_as_wait_in_both(flat_history):
+    _assert_counts_match(flat_history[['Open', 'High', 'Low', 'Close']], RATE_PER_CANDLE)
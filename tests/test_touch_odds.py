@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_inflections
+from market_engine import calculate_ladder, candle_sigma, get_target_time, line_touch_probabilities, simulate_touches, touch_probabilities
+
+def _ladder():
+    inflections = synthetic_inflections(8)
+    target = get_target_time(inflections['hw']['time'].date(), 9)
+    return inflections, target, calculate_ladder(inflections, target)
+
+def test_elapsed_candles_move_lines_to_now():
+    inflections, target, ladder = _ladder()
+    price = float(np.median([l['val'] for l in ladder]))
+    later = {l['label']: l['val'] for l in calculate_ladder(inflections, target + timedelta(hours=2))}
+    odds = line_touch_probabilities(ladder, price, 0.15, 8, elapsed=4)
+    np.testing.assert_allclose([o['val'] for o in odds], [later[o['label']] for o in odds])
+    fresh = line_touch_probabilities([{**l, 'val': later[l['label']]} for l in ladder], price, 0.15, 8)
+    np.testing.assert_allclose([o['touch'] for o in odds], [f['touch'] for f in fresh])
+
+def test_simulation_matches_closed_form():
+    gaps, slopes, sigma = np.array([20.0, -35.0, 15.0, -10.0]), np.array([0.52, 0.52, -0.52, -0.52]), candle_sigma(5000.0, 0.15)
+    touch, close = touch_probabilities(gaps, slopes, sigma, 12)
+    mc_touch, mc_close = simulate_touches(gaps, slopes, sigma, 12, n_paths=400_000, seed=0)
+    np.testing.assert_allclose(mc_touch, touch, atol=0.025) # Candle-close checks with the BGK shift only approximate intrabar touches
+    np.testing.assert_allclose(mc_close, close, atol=0.01)
+
+def test_fat_tail_chunks_are_seed_stable_under_a_small_budget():
+    gaps, slopes, sigma = np.array([20.0, -15.0]), np.array([0.52, -0.52]), candle_sigma(5000.0, 0.15)
+    small = simulate_touches(gaps, slopes, sigma, 12, n_paths=20_000, tail_df=4, seed=3, max_bytes=40 * 1000, workers=1)
+    again = simulate_touches(gaps, slopes, sigma, 12, n_paths=20_000, tail_df=4, seed=3, max_bytes=40 * 1000, workers=1)
+    for a, b in zip(small, again): np.testing.assert_array_equal(a, b)
+    assert np.all((small[0] > 0) & (small[0] <= 1))
+
+@pytest.mark.parametrize('tail_df', [0, 1.5, 2])
+def test_tail_df_without_finite_variance_is_rejected(tail_df):
+    with pytest.raises(ValueError):
+        simulate_touches([10.0], [0.5], 2.0, 4, n_paths=100, tail_df=tail_df, seed=0)